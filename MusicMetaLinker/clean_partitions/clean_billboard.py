@@ -3,11 +3,181 @@ Cleans the billboard data set by retrieving missing metadata from the full
 database dump.
 """
 
-import pandas as pd
+import threading
+from functools import lru_cache
+from pathlib import Path
 
-from linking.spotify_links import get_isrc
+import pandas as pd
+from rapidfuzz import fuzz, process, utils
 
 BILLBOARD_PATH = "MusicMetaLinker/audio_references/billboard_full_features.xlsx"
+# columnar copy of the dump, much faster to load than the Excel file
+PARQUET_PATH = str(Path(BILLBOARD_PATH).with_suffix(".parquet"))
+# columns of the dump used for cleaning, the only ones read from the copy
+BILLBOARD_COLUMNS = ["Song", "Performer", "spotify_track_id"]
+
+# minimum similarity of the song and of the performer of an approximate
+# match, from 0 to 100
+FUZZY_THRESHOLD = 80
+
+_load_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _read_billboard_db() -> pd.DataFrame:
+    """
+    Reads the columns of the full database dump used for cleaning, from its
+    parquet copy if it is up to date, otherwise from the Excel file, which
+    is converted once to parquet for the next runs. If the copy cannot be
+    read or written, e.g. without pyarrow, the Excel file is read instead.
+    Returns
+    -------
+    pd.DataFrame
+        Full database dump, restricted to BILLBOARD_COLUMNS.
+    """
+    excel_path, parquet_path = Path(BILLBOARD_PATH), Path(PARQUET_PATH)
+    if parquet_path.is_file() and \
+            parquet_path.stat().st_mtime >= excel_path.stat().st_mtime:
+        try:
+            return pd.read_parquet(parquet_path, columns=BILLBOARD_COLUMNS)
+        except (ImportError, OSError, ValueError):
+            # unreadable copy, replaced below
+            pass
+    full_db = pd.read_excel(excel_path, usecols=BILLBOARD_COLUMNS)
+    try:
+        full_db.to_parquet(parquet_path, compression="zstd")
+    except (ImportError, OSError, TypeError, ValueError):
+        # pyarrow raises ArrowTypeError or ArrowInvalid, subclasses of
+        # TypeError and ValueError, on columns mixing types
+        parquet_path.unlink(missing_ok=True)
+    return full_db
+
+
+def load_billboard_db() -> pd.DataFrame:
+    """
+    Returns the full database dump, which is read once and shared by all the
+    calls, including the concurrent ones.
+    Returns
+    -------
+    pd.DataFrame
+        Full database dump.
+    """
+    with _load_lock:
+        return _read_billboard_db()
+
+
+@lru_cache(maxsize=1)
+def _build_billboard_index() -> dict[tuple, str]:
+    """
+    Maps each (song, performer) pair of the full database dump to the
+    Spotify ID of its first entry.
+    Returns
+    -------
+    dict[tuple, str]
+        Spotify IDs indexed by song and performer.
+    """
+    full_db = _read_billboard_db().drop_duplicates(subset=["Song", "Performer"])
+    return dict(zip(zip(full_db["Song"], full_db["Performer"]),
+                    full_db["spotify_track_id"]))
+
+
+def load_billboard_index() -> dict[tuple, str]:
+    """
+    Returns the Spotify IDs of the full database dump indexed by song and
+    performer, built once and shared by all the calls.
+    Returns
+    -------
+    dict[tuple, str]
+        Spotify IDs indexed by song and performer.
+    """
+    with _load_lock:
+        return _build_billboard_index()
+
+
+@lru_cache(maxsize=1)
+def _build_fuzzy_choices() -> tuple[list[str], list[str], list[tuple]]:
+    """
+    Splits the (song, performer) pairs of the index, to be matched
+    approximately.
+    Returns
+    -------
+    songs : list[str]
+        Song of each pair.
+    performers : list[str]
+        Performer of each pair.
+    keys : list[tuple]
+        Index key of each pair.
+    """
+    keys = list(_build_billboard_index())
+    songs = [str(song) for song, _ in keys]
+    performers = [str(performer) for _, performer in keys]
+    return songs, performers, keys
+
+
+def _fuzzy_key(track_title: str, artist_name: str) -> tuple | None:
+    """
+    Returns the index key of the entry most similar to the track, if the
+    similarity of both its song and its performer is at least
+    FUZZY_THRESHOLD, tolerating differences in case, punctuation or word
+    order. The similarity depends on the length of the names, so that a
+    short title does not match a longer one containing it.
+    Parameters
+    ----------
+    track_title : str
+        Track title.
+    artist_name : str
+        Artist name.
+    Returns
+    -------
+    tuple | None
+        Index key of the entry, or None if no entry is similar enough.
+    """
+    if not track_title or not artist_name:
+        return None
+    with _load_lock:
+        songs, performers, keys = _build_fuzzy_choices()
+    # entries with a similar song, whose performer is compared next
+    candidates = process.extract(track_title, songs,
+                                 scorer=fuzz.token_sort_ratio,
+                                 processor=utils.default_process,
+                                 score_cutoff=FUZZY_THRESHOLD,
+                                 limit=None)
+    best_key, best_score = None, 0.0
+    for _, song_score, idx in candidates:
+        performer_score = fuzz.token_sort_ratio(
+            artist_name, performers[idx], processor=utils.default_process)
+        if performer_score >= FUZZY_THRESHOLD and \
+                song_score + performer_score > best_score:
+            best_key, best_score = keys[idx], song_score + performer_score
+    return best_key
+
+
+def find_spotify_id(track_title: str, artist_name: str) -> str | None:
+    """
+    Finds the Spotify ID of a track in the full database dump.
+    Parameters
+    ----------
+    track_title : str
+        Track title.
+    artist_name : str
+        Artist name.
+    Returns
+    -------
+    str | None
+        Spotify ID, or None if the track is not found or has no Spotify ID.
+    """
+    index = load_billboard_index()
+    # retrieve the track metadata
+    key = (track_title, artist_name)
+    # if no metadata is found, try to invert the artist and track title
+    if key not in index:
+        key = (artist_name, track_title)
+    # otherwise, look for an approximate match
+    if key not in index:
+        key = _fuzzy_key(track_title, artist_name)
+    if key is None or pd.isna(index[key]):
+        return None
+    return index[key]
 
 
 def clean_billboard(track_title: str,
@@ -30,25 +200,14 @@ def clean_billboard(track_title: str,
     spotify_id : str
         Spotify ID.
     """
-    spotify_id = None
-    full_db = pd.read_excel(BILLBOARD_PATH)
-    # retrieve the track metadata
-    track_metadata = full_db.loc[
-        (full_db["Song"] == track_title) &
-        (full_db["Performer"] == artist_name)
-    ]
-
-    # if no metadata is found, try to invert the artist and track title
-    if track_metadata.empty:
-        track_metadata = full_db.loc[
-            (full_db["Song"] == artist_name) &
-            (full_db["Performer"] == track_title)
-        ]
+    # imported here, as only the billboard partition needs Spotify
+    from linking.spotify_links import get_isrc
 
-    # get the isrc from the track_metadata
+    # get the isrc from the spotify_track_id, if the track has one
+    spotify_id = find_spotify_id(track_title, artist_name)
+    if spotify_id is None:
+        return None, None
     try:
-        # get the spotify_track_id from the track_metadata
-        spotify_id = track_metadata["spotify_track_id"].values[0]
         isrc = get_isrc(spotify_id)
     except Exception:
         isrc = None
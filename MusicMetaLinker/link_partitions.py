@@ -22,30 +22,165 @@ Notes for the alignment:
 """
 
 import argparse
+import csv
 import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed, wait)
+from itertools import islice
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
+import requests
 from tqdm import tqdm
 
-from clean_partitions import clean_billboard
 from filter_partitions import filter_partition
-from linking import linking
+from linking import cache, linking
+from linking.acousticbrainz_links import acousticbrainz_links_bulk
 from preprocessor import JAMSProcessor
 from utils import log_downloaded_data
 
 logging.basicConfig(filename='./link_partitions.log', level=logging.DEBUG,
                     format='%(asctime)s %(levelname)s %(name)s %(message)s')
 logger = logging.getLogger('link_partitions')
-logging.getLogger("musicbrainzngs").setLevel(logging.ERROR)
+
+# the linking waits on the web services, so many more threads than CPUs
+# are useful until the rate limits kick in
+DEFAULT_WORKERS = min(32, 4 * (os.cpu_count() or 1))
+
+# columns of the linking dataframe stored for each partition
+LINKING_COLUMNS = [
+    'jams_file',
+    'track_name',
+    'artist_name',
+    'album_name',
+    'track_number',
+    'duration',
+    'release_year',
+    'musicbrainz',
+    'isrc',
+    'deezer_id',
+    'deezer_url',
+    'youtube_url',
+    'acousticbrainz',
+    'spotify_id',
+]
+
+# types of the columns of the linking dataframe, so that the identifiers are
+# not parsed as numbers (e.g. Deezer IDs as floats when some are missing)
+LINKING_DTYPES = {column: 'string' for column in LINKING_COLUMNS}
+LINKING_DTYPES['duration'] = 'Float64'
+
+# namespace of the linked rows in the persistent cache
+ROWS_NAMESPACE = "linking.rows"
+
+# columns of the linking dataframe stored as identifiers in the JAMS files
+LINK_FIELDS = (
+    'musicbrainz',
+    'acousticbrainz',
+    'isrc',
+    'deezer_id',
+    'deezer_url',
+    'youtube_url',
+    'spotify_id',
+)
+
+
+def has_links(row: dict) -> bool:
+    """
+    Tells whether any link was found for a row of the linking dataframe.
+    Parameters
+    ----------
+    row : dict
+        Row of the linking dataframe.
+    Returns
+    -------
+    bool
+        False if all the links of the row are empty.
+    """
+    return any(row[field] not in (None, '') for field in LINK_FIELDS)
+
+
+def load_done(linking_path: Path) -> tuple[set[str], float]:
+    """
+    Loads the names of the JAMS files already linked in a previous run of a
+    partition, from the sidecar file written next to the linking dataframe.
+    Falls back to the linking dataframe itself if the sidecar is missing.
+    Parameters
+    ----------
+    linking_path : Path
+        Path to the linking dataframe of the partition.
+    Returns
+    -------
+    done : set[str]
+        Names of the JAMS files already linked.
+    timestamp : float
+        Modification time of the file the names were read from, JAMS files
+        modified afterwards need to be linked again.
+    """
+    done_path = linking_path.with_suffix(".done")
+    if done_path.is_file():
+        done = set(done_path.read_text().split("\n"))
+        done.discard("")
+        return done, done_path.stat().st_mtime
+    if linking_path.is_file():
+        done = set(pd.read_csv(linking_path, usecols=['jams_file'])['jams_file'])
+        return done, linking_path.stat().st_mtime
+    return set(), 0.0
+
+
+def select_jams_files(jams_path: Path,
+                      done: set[str],
+                      done_time: float,
+                      aligned: dict[str, float],
+                      ) -> list[Path]:
+    """
+    Lists the JAMS files of a partition that still need to be linked.
+    Parameters
+    ----------
+    jams_path : Path
+        Path to the JAMS files of the partition.
+    done : set[str]
+        Names of the JAMS files linked by a previous run, see load_done.
+    done_time : float
+        Time the previous run recorded them, the files modified afterwards
+        are linked again.
+    aligned : dict[str, float]
+        Modification times of the aligned JAMS files to be skipped, by name,
+        the files modified after their aligned copy are linked again.
+    Returns
+    -------
+    list[Path]
+        Paths to the JAMS files to be linked.
+    """
+    jams_files = []
+    with os.scandir(jams_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".jams") or not entry.is_file():
+                continue
+            # if the aligned file exists and is up to date, skip
+            if entry.name in aligned and \
+                    aligned[entry.name] >= entry.stat().st_mtime:
+                logger.info(
+                    f"JAMS file {entry.name} already exists, skipping")
+                continue
+            if entry.name in done and \
+                    entry.stat().st_mtime <= done_time:
+                logger.info(
+                    f"JAMS file {entry.name} already linked, skipping")
+                continue
+            jams_files.append(Path(entry.path))
+    return jams_files
 
 
 def complement_jams(linker: linking.Align,
                     jams_process: JAMSProcessor,
-                    df_list: list,
                     jams_file: Path,
                     isrc: str | None = None,
-                    spotify_id: str | None = None) -> list:
+                    spotify_id: str | None = None) -> dict:
     """
     Complements the JAMS file with the retrieved links.
     Parameters
@@ -54,8 +189,6 @@ def complement_jams(linker: linking.Align,
         Linker object.
     jams_process : JAMSProcessor
         JAMSProcessor object.
-    df_list : list
-        List of dictionaries to be stored in a dataframe.
     jams_file : Path
         Path to the JAMS file.
     isrc : str
@@ -64,61 +197,266 @@ def complement_jams(linker: linking.Align,
         Spotify ID.
     Returns
     -------
-    None
+    dict
+        Row of the linking dataframe for the JAMS file.
     """
-    track_name = linker.get_track()
-    artist_name = linker.get_artist()
-    album_name = linker.get_album()
-    track_number = linker.get_track_number()
-    duration = linker.get_duration()
-    release_year = linker.get_release_date()
-    # get the identifiers
-    original_identifiers = jams_process.identifiers
-    links = {'musicbrainz': linker.get_mbid(),
-             'acousticbrainz': linker.get_acousticbrainz_link(),
-             'isrc': linker.get_isrc() if isrc is None else isrc,
-             'deezer_id': linker.get_deezer_id(),
-             'deezer_url': linker.get_deezer_link(),
-             'youtube_url': linker.get_youtube_link(),
-             'spotify_id': spotify_id,
-             }
+    resolved = linker.resolve()
+
+    # store information in a dataframe row
+    row = {'jams_file': jams_file.name,
+           'track_name': resolved['track'],
+           'artist_name': resolved['artist'],
+           'album_name': resolved['album'],
+           'track_number': resolved['track_number'],
+           'duration': resolved['duration'],
+           'release_year': resolved['release_date'],
+           'musicbrainz': resolved['mbid'],
+           'isrc': resolved['isrc'] if isrc is None else isrc,
+           'deezer_id': resolved['deezer_id'],
+           'deezer_url': resolved['deezer_link'],
+           'youtube_url': resolved['youtube_link'],
+           'acousticbrainz': resolved['acousticbrainz_link'],
+           'spotify_id': spotify_id,
+           }
 
     # add retrieved information to the JAMS file
-    jams_process.track_name = track_name
-    jams_process.artist_name = artist_name
-    jams_process.album_name = album_name
-    jams_process.track_number = track_number
-    jams_process.duration = duration
-    jams_process.release_year = release_year
-    jams_process.identifiers = {**original_identifiers, **links}
-
-    # store information in a dataframe
-    df_list.append({'jams_file': jams_file.name,
-                    'track_name': track_name,
-                    'artist_name': artist_name,
-                    'album_name': album_name,
-                    'track_number': track_number,
-                    'duration': duration,
-                    'release_year': release_year,
-                    'musicbrainz': links['musicbrainz'],
-                    'isrc': links['isrc'],
-                    'deezer_id': links['deezer_id'],
-                    'deezer_url': links['deezer_url'],
-                    'youtube_url': links['youtube_url'],
-                    'acousticbrainz': links['acousticbrainz'],
-                    'spotify_id': links['spotify_id'],
-                    })
-
-    return df_list
+    apply_links(jams_process, row)
+    return row
+
+
+def apply_links(jams_process: JAMSProcessor, row: dict) -> None:
+    """
+    Stores the information of a row of the linking dataframe in the JAMS
+    file, keeping its original identifiers.
+    Parameters
+    ----------
+    jams_process : JAMSProcessor
+        JAMSProcessor object.
+    row : dict
+        Row of the linking dataframe.
+    Returns
+    -------
+    None
+    """
+    jams_process.track_name = row['track_name']
+    jams_process.artist_name = row['artist_name']
+    jams_process.album_name = row['album_name']
+    jams_process.track_number = row['track_number']
+    jams_process.duration = row['duration']
+    jams_process.release_year = row['release_year']
+    jams_process.identifiers = {**(jams_process.identifiers or {}),
+                                **{field: row[field] for field in LINK_FIELDS}}
+
+
+def prepare_query(jams_process: JAMSProcessor,
+                  partition_name: str) -> dict:
+    """
+    Extracts the search parameters of a JAMS file, handling the peculiarities
+    of each partition.
+    Parameters
+    ----------
+    jams_process : JAMSProcessor
+        JAMSProcessor object.
+    partition_name : str
+        Name of the partition the JAMS file belongs to.
+    Returns
+    -------
+    dict
+        Search parameters, namely "mbid_track", "mbid_release", "artist" and
+        "track".
+    """
+    track_title = jams_process.track_name
+    artist_name = jams_process.artist_name
+    musicbrainz_id = jams_process.musicbrainz_id
+    musicbrainz_id_release: str | None = None
+    # filter partitions that have some peculiarities
+    if partition_name == "schubert-winterreise":
+        musicbrainz_id_release = jams_process.musicbrainz_id
+        musicbrainz_id = None
+        if musicbrainz_id_release and \
+                '://musicbrainz.org' in musicbrainz_id_release:
+            musicbrainz_id_release = musicbrainz_id_release.split(
+                '/')[-1]
+    if partition_name == "biab-internet-corpus":
+        track_title = track_title.strip()
+        if ' - ' in track_title:
+            artist_name = track_title.split(' - ')[1]
+            track_title = track_title.split(' - ')[0].strip()
+        if '[' in track_title and ']' in track_title:
+            artist_name = track_title.split('[')[1].strip(']')
+            track_title = track_title.split('[')[0].strip()
+    return {'mbid_track': musicbrainz_id,
+            'mbid_release': musicbrainz_id_release,
+            'artist': artist_name,
+            'track': track_title,
+            }
+
+
+def parse_ahead(parse_pool: ProcessPoolExecutor,
+                jams_files: list[Path],
+                window: int) -> Iterator[JAMSProcessor]:
+    """
+    Parses the JAMS files in the given pool, yielding them in order. Unlike
+    Executor.map, at most window files are parsed ahead of the consumer, so
+    that the parsed files do not pile up in memory.
+    Parameters
+    ----------
+    parse_pool : ProcessPoolExecutor
+        Pool of processes parsing the JAMS files.
+    jams_files : list[Path]
+        Paths to the JAMS files.
+    window : int
+        Maximum number of files parsed ahead.
+    Returns
+    -------
+    Iterator[JAMSProcessor]
+        JAMSProcessor object of each JAMS file.
+    """
+    files = iter(jams_files)
+    ahead = deque(parse_pool.submit(JAMSProcessor, jams_file)
+                  for jams_file in islice(files, window))
+    while ahead:
+        jams_process = ahead.popleft().result()
+        for jams_file in islice(files, 1):
+            ahead.append(parse_pool.submit(JAMSProcessor, jams_file))
+        yield jams_process
+
+
+def prefetch_billboard_isrcs(queries: list[dict]) -> list[str | None]:
+    """
+    Retrieves at once the ISRC codes of the Billboard tracks to be linked,
+    so that clean_billboard does not query Spotify for each of them.
+    Parameters
+    ----------
+    queries : list[dict]
+        Search parameters of the tracks, as returned by prepare_query.
+    Returns
+    -------
+    list[str | None]
+        ISRC code of each track, or None if it is not found.
+    """
+    # imported here, as they load the Billboard dump and Spotify client
+    from clean_partitions.clean_billboard import find_spotify_id
+    from linking.spotify_links import get_isrcs_bulk
+
+    spotify_ids = [find_spotify_id(query['track'], query['artist'])
+                   for query in queries]
+    isrcs = get_isrcs_bulk([spotify_id for spotify_id in spotify_ids
+                            if spotify_id])
+    return [isrcs[str(spotify_id)] if spotify_id else None
+            for spotify_id in spotify_ids]
+
+
+def plan_lookups(jams_processes: list[JAMSProcessor],
+                 partition_name: str,
+                 partition_type: str,
+                 ) -> dict[tuple, list[JAMSProcessor]]:
+    """
+    Groups the JAMS files that would be linked with the same search
+    parameters, so that each group is looked up only once.
+    Parameters
+    ----------
+    jams_processes : list[JAMSProcessor]
+        JAMSProcessor objects to be linked.
+    partition_name : str
+        Name of the partition the JAMS files belong to.
+    partition_type : str
+        Type of the partition, either "audio" or "score".
+    Returns
+    -------
+    dict[tuple, list[JAMSProcessor]]
+        JAMSProcessor objects indexed by their search parameters.
+    """
+    plan: dict[tuple, list[JAMSProcessor]] = {}
+    for jams_process in jams_processes:
+        query = prepare_query(jams_process, partition_name)
+        key = (query['mbid_track'],
+               query['mbid_release'],
+               query['artist'],
+               jams_process.album_name,
+               query['track'],
+               jams_process.track_number,
+               jams_process.duration if partition_type == "audio" else None,
+               partition_name == "billboard")
+        plan.setdefault(key, []).append(jams_process)
+    return plan
+
+
+def process_jams(jams_process: JAMSProcessor,
+                 partition_name: str,
+                 partition_type: str,
+                 mb_recording: dict | None = None,
+                 ) -> tuple[JAMSProcessor, dict]:
+    """
+    Retrieves the links for a single JAMS file.
+    Parameters
+    ----------
+    jams_process : JAMSProcessor
+        JAMSProcessor object of the JAMS file.
+    partition_name : str
+        Name of the partition the JAMS file belongs to.
+    partition_type : str
+        Type of the partition, either "audio" or "score".
+    mb_recording : dict | None
+        MusicBrainz recording already retrieved for the JAMS file.
+    Returns
+    -------
+    jams_process : JAMSProcessor
+        JAMSProcessor object complemented with the retrieved links.
+    row : dict
+        Row of the linking dataframe for the JAMS file.
+    """
+    jams_file = jams_process.jams_file
+    # log track information
+    logger.debug("Processing JAMS file %s", jams_file.name)
+
+    # get data from specific partitions
+    isrc, spotify_id = None, None
+    query = prepare_query(jams_process, partition_name)
+    if partition_name == "billboard":
+        # imported here, as it loads the Billboard dump and Spotify client
+        from clean_partitions import clean_billboard
+        spotify_id, isrc = clean_billboard.clean_billboard(query['track'],
+                                                           query['artist'])
+    # retrieve the links
+    linker = linking.Align(
+        mbid_track=query['mbid_track'],
+        mbid_release=query['mbid_release'],
+        artist=query['artist'],
+        album=jams_process.album_name,
+        track=query['track'],
+        track_number=jams_process.track_number,
+        duration=jams_process.duration if partition_type == "audio" else None,
+        isrc=isrc,
+        strict=False,
+        mb_recording=mb_recording,
+    )
+
+    # complement the JAMS file with the retrieved links
+    row = complement_jams(linker, jams_process, jams_file, isrc, spotify_id)
+    return jams_process, row
 
 
 def retrieve_links(partitions_path: Path,
                    save: bool = True,
                    limit: str | None = None,
-                   overwrite: bool = False,
+                   skip_aligned: bool = False,
+                   workers: int = DEFAULT_WORKERS,
+                   resume: bool = True,
+                   parsers: int | None = None,
+                   partitions: int = 4,
                    ) -> None:
     """
     Iterates over the partitions and retrieves the links for each one of them.
+    The JAMS files of a partition are parsed in separate processes, as the
+    parsing is CPU-bound, and handed over in batches to a pool of threads
+    that link them, as the linking is bound by the requests to the web
+    services. Parsing thus overlaps with the pending requests, while the
+    results are written by a single thread per partition.
+    Several partitions are linked at the same time, sharing the parsing
+    processes and the rate limits of the web services.
+    Each linked file is recorded as soon as it is processed, so that an
+    interrupted run can be resumed without querying the web services again.
     Parameters
     ----------
     partitions_path : Path
@@ -127,87 +465,202 @@ def retrieve_links(partitions_path: Path,
         Whether to save the retrieved information in a new JAMS file or not.
     limit : str | None
         Limit for the partition, accepts "audio", "score" or None.
+    skip_aligned : bool
+        Whether to skip the JAMS files that have already been aligned, unless
+        they have been modified since. Only applies when saving.
+    workers : int
+        Maximum number of JAMS files linked concurrently.
+    resume : bool
+        Whether to skip the JAMS files linked by a previous run, unless they
+        have been modified since, and to reuse the rows stored for the same
+        tracks by previous runs.
+    parsers : int | None
+        Number of processes parsing the JAMS files, defaults to the number
+        of CPUs.
+    partitions : int
+        Maximum number of partitions linked concurrently.
     Returns
     -------
     None
     """
-    # iterate over the partitions
-    for partition in tqdm(partitions_path.iterdir()):
-        # initialize data to be stored in a dataframe
-        df_list = []
-        # get the path to the JAMS files for the partition
-        partition_type, jams_path = filter_partition(partition, limit=limit)
-        print(partition_type, jams_path)
-        if jams_path is None or partition_type is None:
-            continue
-
-        # log partition information
-        logger.info(f"Processing partition {partition.name}")
-
-        # iterate over the JAMS files
-        for jams_file in tqdm(jams_path.glob("*.jams"), leave=False):
-            # if file exists, skip
-            if overwrite and (jams_file.parent.parent / "jams-aligned" / jams_file.name).exists():
-                logger.info(
-                    f"JAMS file {jams_file.name} already exists, skipping")
+    # rows of the tracks linked so far, shared by the duplicated tracks
+    linked: dict[tuple, dict] = {}
+    # the parsing processes are spawned rather than forked, as they are
+    # started from the partition threads, while the linking threads may hold
+    # locks (rate limiters, caches) that a forked child would inherit held
+    with ProcessPoolExecutor(max_workers=parsers,
+                             mp_context=multiprocessing.get_context("spawn")
+                             ) as parse_pool, \
+            ThreadPoolExecutor(max_workers=partitions) as partition_pool:
+        futures = [partition_pool.submit(_link_partition, partition,
+                                         parse_pool, linked, save, limit,
+                                         skip_aligned, workers, resume)
+                   for partition in partitions_path.iterdir()]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            future.result()
+
+
+def _link_partition(partition: Path,
+                    parse_pool: ProcessPoolExecutor,
+                    linked: dict[tuple, dict],
+                    save: bool,
+                    limit: str | None,
+                    skip_aligned: bool,
+                    workers: int,
+                    resume: bool,
+                    ) -> None:
+    """
+    Retrieves the links for the JAMS files of a single partition, see
+    retrieve_links for the parameters. Tracks already looked up, in this or
+    in a previous partition or run, are not looked up again, and their links
+    are copied from the stored rows.
+    """
+    # get the path to the JAMS files for the partition
+    partition_type, jams_path = filter_partition(partition, limit=limit)
+    logger.debug("Partition %s: %s, %s", partition.name, partition_type,
+                 jams_path)
+    if jams_path is None or partition_type is None:
+        return
+
+    # log partition information
+    logger.info(f"Processing partition {partition.name}")
+
+    # files linked by a previous run
+    linking_path = partition / "choco" / "linking.csv"
+    done_path = linking_path.with_suffix(".done")
+    done, done_time = load_done(linking_path) if resume else (set(), 0.0)
+
+    # list the aligned files once instead of checking each file
+    aligned_path = jams_path.parent / "jams-aligned"
+    aligned: dict[str, float] = {}
+    if save and skip_aligned and aligned_path.is_dir():
+        with os.scandir(aligned_path) as entries:
+            aligned = {entry.name: entry.stat().st_mtime
+                       for entry in entries}
+
+    jams_files = select_jams_files(jams_path, done, done_time, aligned)
+
+    # start over if the previous run is not resumed
+    resumed = resume and bool(done)
+    if not resumed:
+        linking_path.unlink(missing_ok=True)
+        done_path.unlink(missing_ok=True)
+
+    if save and jams_files:
+        aligned_path.mkdir(parents=True, exist_ok=True)
+    progress = tqdm(total=len(jams_files), leave=False)
+
+    def record(jams_process: JAMSProcessor, row: dict) -> None:
+        progress.update()
+        logger.debug("Linked %s", row)
+
+        if save:
+            logger.debug("Saving JAMS file to %s", aligned_path)
+            jams_process.write_jams(aligned_path)
+
+        # record the row before marking the file as linked
+        writer.writerow(row)
+        linking_file.flush()
+        done_file.write(row['jams_file'] + "\n")
+        done_file.flush()
+
+    def share(jams_process: JAMSProcessor, row: dict) -> None:
+        row = {**row, 'jams_file': jams_process.jams_file.name}
+        apply_links(jams_process, row)
+        record(jams_process, row)
+
+    def drain(block: bool) -> None:
+        # record the finished lookups and release their JAMS files
+        finished, _ = wait(pending, timeout=None if block else 0,
+                           return_when=FIRST_COMPLETED)
+        for future in finished:
+            key = pending.pop(future)
+            try:
+                jams_process, row = future.result()
+            except requests.RequestException as error:
+                # neither stored nor marked as linked, so that the files
+                # are linked again by the next run
+                failed = groups.pop(key)
+                logger.warning("Linking %s failed: %s",
+                               failed[0].jams_file.name, error)
+                progress.update(len(failed))
                 continue
-            # log track information
-            logger.info(f"Processing JAMS file {jams_file.name}")
-            # process the JAMS file
-            jams_process = JAMSProcessor(jams_file)
-
-            # get data from specific partitions
-            isrc, spotify_id = None, None
-
-            track_title = jams_process.track_name
-            artist_name = jams_process.artist_name
-            musicbrainz_id = jams_process.musicbrainz_id
-            musicbrainz_id_release: str | None = None
-            # filter partitions that have some peculiarities
-            if partition.name == "schubert-winterreise":
-                musicbrainz_id_release = jams_process.musicbrainz_id
-                musicbrainz_id = None
-                if musicbrainz_id_release and \
-                        '://musicbrainz.org' in musicbrainz_id_release:
-                    musicbrainz_id_release = musicbrainz_id_release.split(
-                        '/')[-1]
+            linked[key] = row
+            cache.store(ROWS_NAMESPACE, list(key), row,
+                        miss=not has_links(row))
+            record(jams_process, row)
+            for duplicate in groups.pop(key)[1:]:
+                share(duplicate, row)
+
+    # link the JAMS files concurrently, as soon as a batch is parsed
+    write_header = not linking_path.is_file() or \
+        linking_path.stat().st_size == 0
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            open(linking_path, "a", newline="") as linking_file, \
+            open(done_path, "a") as done_file:
+        writer = csv.DictWriter(linking_file, fieldnames=LINKING_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        parsed = parse_ahead(parse_pool, jams_files,
+                             window=2 * linking.BATCH_SIZE)
+        # lookups in progress, and the JAMS files waiting for each of them
+        pending = {}
+        groups: dict[tuple, list[JAMSProcessor]] = {}
+        while batch := list(islice(parsed, linking.BATCH_SIZE)):
+            leaders = []
+            for key, group in plan_lookups(batch, partition.name,
+                                           partition_type).items():
+                if key in linked:
+                    for jams_process in group:
+                        share(jams_process, linked[key])
+                elif key in groups:
+                    groups[key].extend(group)
+                elif resume and (row := cache.load(
+                        ROWS_NAMESPACE, list(key),
+                        is_miss=lambda row: not has_links(row))) is not None:
+                    # linked by a previous run
+                    linked[key] = row
+                    for jams_process in group:
+                        share(jams_process, row)
+                else:
+                    groups[key] = group
+                    leaders.append((key, group[0]))
+            # retrieve the recordings of the batch at once
+            queries = [{**prepare_query(jams_process, partition.name),
+                        'album': jams_process.album_name,
+                        'duration': jams_process.duration
+                        if partition_type == "audio" else None}
+                       for _, jams_process in leaders]
             if partition.name == "billboard":
-                spotify_id, isrc = clean_billboard.clean_billboard(track_title,
-                                                                   artist_name)
-            if partition.name == "biab-internet-corpus":
-                track_title = track_title.strip()
-                if ' - ' in track_title:
-                    artist_name = track_title.split(' - ')[1]
-                    track_title = track_title.split(' - ')[0].strip()
-                if '[' in track_title and ']' in track_title:
-                    artist_name = track_title.split('[')[1].strip(']')
-                    track_title = track_title.split('[')[0].strip()
-            # retrieve the links
-            linker = linking.Align(
-                mbid_track=musicbrainz_id,
-                mbid_release=musicbrainz_id_release,
-                artist=artist_name,
-                album=jams_process.album_name,
-                track=track_title,
-                track_number=jams_process.track_number,
-                duration=jams_process.duration if partition_type == "audio" else None,
-                isrc=isrc,
-                strict=False,
-            )
-
-            # complement the JAMS file with the retrieved links
-            df_list = complement_jams(linker, jams_process, df_list, jams_file,
-                                      isrc, spotify_id)
-            print(df_list[-1])
-
-            if save:
-                save_path = jams_path.parent / "jams-aligned"
-                print(f"Saving JAMS file to {save_path}")
-                jams_process.write_jams(save_path)
-
-        # save the dataframe
-        df = pd.DataFrame(df_list, index=None)
-        log_downloaded_data(df, partition / "choco" / "linking.csv")
+                # looked up by the ISRC clean_billboard finds, as in
+                # process_jams
+                for query, isrc in zip(queries,
+                                       prefetch_billboard_isrcs(queries)):
+                    query['isrc'] = isrc
+            recordings = linking.MusicBrainzAlign.batch_lookup(queries)
+            acousticbrainz_links_bulk([query['mbid_track']
+                                       for query in queries
+                                       if query['mbid_track']])
+            for idx, (key, jams_process) in enumerate(leaders):
+                # bound the lookups waiting for a worker, so that the parsed
+                # JAMS files do not pile up when linking is slower
+                while len(pending) >= 2 * workers:
+                    drain(block=True)
+                future = executor.submit(process_jams, jams_process,
+                                         partition.name, partition_type,
+                                         recordings.get(idx))
+                pending[future] = key
+            drain(block=False)
+        while pending:
+            drain(block=True)
+    progress.close()
+
+    # the rows were streamed to the dataframe, which needs to be rewritten
+    # only to keep the latest row of the files relinked after a resume
+    if resumed:
+        df = pd.read_csv(linking_path, dtype=LINKING_DTYPES).drop_duplicates(
+            subset='jams_file', keep='last')
+        log_downloaded_data(df, linking_path)
 
 
 def main() -> None:
@@ -220,7 +673,7 @@ def main() -> None:
         - limit: Limit for the partition, accepts "audio", "score" or None.
 
     Example of usage:
-        python link_partitions.py /path/to/partitions --save --limit audio --overwrite
+        python link_partitions.py /path/to/partitions --save --limit audio --skip-aligned
         
     Returns
     -------
@@ -240,12 +693,45 @@ def main() -> None:
                         help="Limit for the partition, accepts 'audio', "
                              "'score' or None.",
                         choices=["audio", "score"])
-    parser.add_argument("--overwrite", action="store_true",
-                        default=True,
-                        help="Whether to overwrite existing files or not.")
+    parser.add_argument("--skip-aligned", action="store_true",
+                        default=False,
+                        help="Whether to skip the JAMS files whose aligned "
+                             "copy is newer than them, instead of linking "
+                             "and overwriting them again.")
+    parser.add_argument("--no-cache", action="store_true",
+                        default=False,
+                        help="Whether to ignore the cached responses of the "
+                             "web services and query them again.")
+    parser.add_argument("--retry-misses", action="store_true",
+                        default=False,
+                        help="Whether to search again on MusicBrainz and "
+                             "YouTube Music the tracks that were not found "
+                             "in a previous run. The cached Deezer and "
+                             "AcousticBrainz responses are only refreshed "
+                             "by --no-cache.")
+    parser.add_argument("--no-resume", action="store_true",
+                        default=False,
+                        help="Whether to link again the JAMS files linked by "
+                             "a previous run.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Maximum number of JAMS files linked "
+                             "concurrently.")
+    parser.add_argument("--parsers", type=int, default=None,
+                        help="Number of processes parsing the JAMS files, "
+                             "defaults to the number of CPUs.")
+    parser.add_argument("--partitions", type=int, default=4,
+                        help="Maximum number of partitions linked "
+                             "concurrently.")
     args = parser.parse_args()
 
-    retrieve_links(args.partitions_path, args.save, args.limit)
+    if args.no_cache:
+        cache.set_enabled(False)
+    if args.retry_misses:
+        cache.set_retry_misses(True)
+
+    retrieve_links(args.partitions_path, args.save, args.limit,
+                   skip_aligned=args.skip_aligned, workers=args.workers,
+                   resume=not args.no_resume, parsers=args.parsers, partitions=args.partitions)
 
 
 if __name__ == "__main__":
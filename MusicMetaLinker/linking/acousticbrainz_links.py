@@ -3,6 +3,21 @@ Linking module for AcousticBrainz data.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import cached_session
+
+# endpoint counting the submissions of up to BULK_SIZE recordings at once
+BULK_URL = "https://acousticbrainz.org/api/v1/count"
+BULK_SIZE = 25
+
+# only the existence of the resources is checked, so HEAD responses are
+# cached across runs, as well as the bulk counts
+_SESSION = cached_session("acousticbrainz_http", methods=("GET", "HEAD"))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+# links already checked, either one by one or in bulk
+_links: dict[str, str | None] = {}
 
 
 def acousticbrainz_link(mbid: str) -> str | None:
@@ -18,11 +33,47 @@ def acousticbrainz_link(mbid: str) -> str | None:
     str
         AcousticBrainz link.
     """
+    if mbid in _links:
+        return _links[mbid]
     url = f"https://acousticbrainz.org/{mbid}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return url
-    return None
+    response = _SESSION.head(url, timeout=5, allow_redirects=False)
+    _links[mbid] = url if response.status_code == 200 else None
+    return _links[mbid]
+
+
+def acousticbrainz_links_bulk(mbids: list[str]) -> dict[str, str | None]:
+    """
+    Checks whether the acousticbrainz resources of several recordings exist,
+    with one request every BULK_SIZE recordings. The results are stored, so
+    that the following calls to acousticbrainz_link do not query the
+    service again.
+    Parameters
+    ----------
+    mbids : list[str]
+        MusicBrainz IDs.
+    Returns
+    -------
+    dict[str, str | None]
+        AcousticBrainz link of each MusicBrainz ID, or None if the resource
+        does not exist or could not be checked.
+    """
+    missing = [mbid for mbid in dict.fromkeys(mbids) if mbid not in _links]
+    for start in range(0, len(missing), BULK_SIZE):
+        chunk = missing[start:start + BULK_SIZE]
+        try:
+            response = _SESSION.get(BULK_URL,
+                                    params={"recording_ids": ";".join(chunk)},
+                                    timeout=10)
+            response.raise_for_status()
+        except requests.RequestException:
+            # left to be checked one by one
+            continue
+        counts = response.json()
+        for mbid in chunk:
+            found = counts.get(mbid, {}).get("count", 0) > 0
+            _links[mbid] = f"https://acousticbrainz.org/{mbid}" if found \
+                else None
+    return {mbid: _links.get(mbid) for mbid in mbids}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,228 @@
+"""
+Persistent on-disk caches for the responses of the web services, so that
+repeated runs over the same partitions do not query them again.
+Three layers are provided:
+    - a function-level cache for the search methods (e.g. MusicBrainz), keyed
+    on the search parameters, with an in-memory LRU in front of the disk, so
+    that the instances searching for the same tracks within a run share the
+    results without reading them back from disk;
+    - HTTP-level cached sessions for clients built on requests (e.g.
+    deezer-python);
+    - explicit load/store of whole results, e.g. the linked row of a track.
+"""
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import diskcache
+import requests_cache
+
+CACHE_DIR = Path("~/.cache/MusicMetaLinker").expanduser()
+EXPIRE_AFTER = 30 * 24 * 3600
+# empty results, i.e. tracks missing from the services, which may be added
+# to them in the meantime
+MISS_EXPIRE_AFTER = 7 * 24 * 3600
+# number of search results kept in memory
+MEMORY_SIZE = 4096
+
+_lookups = diskcache.Cache(str(CACHE_DIR / "lookups"))
+_sessions: list[requests_cache.CachedSession] = []
+_enabled = True
+_retry_misses = False
+_MISSING = object()
+_memory: OrderedDict = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool) -> None:
+    """
+    Enables or disables all the caches, e.g. to force a refresh of the
+    stored responses.
+    Parameters
+    ----------
+    enabled : bool
+        Whether to read from and write to the caches.
+    Returns
+    -------
+    None
+    """
+    global _enabled
+    _enabled = enabled
+    for session in _sessions:
+        session.settings.disabled = not enabled
+
+
+def set_retry_misses(retry: bool) -> None:
+    """
+    Sets whether the searches that found nothing in a previous run are
+    performed again instead of being answered from the cache. Only the
+    results cached by cached and load are concerned, not the responses of
+    the cached sessions, which are stored as successful responses.
+    Parameters
+    ----------
+    retry : bool
+        Whether to ignore the cached empty results.
+    Returns
+    -------
+    None
+    """
+    global _retry_misses
+    _retry_misses = retry
+
+
+def cached_session(name: str,
+                   methods: tuple[str, ...] = ("GET",),
+                   ) -> requests_cache.CachedSession:
+    """
+    Returns a requests session whose responses are cached on disk.
+    Parameters
+    ----------
+    name : str
+        Name of the cache, used as file name of the sqlite database.
+    methods : tuple[str, ...]
+        HTTP methods whose responses are cached.
+    Returns
+    -------
+    requests_cache.CachedSession
+        Cached session.
+    """
+    session = requests_cache.CachedSession(
+        str(CACHE_DIR / name),
+        backend="sqlite",
+        expire_after=EXPIRE_AFTER,
+        allowable_methods=methods,
+    )
+    session.settings.disabled = not _enabled
+    _sessions.append(session)
+    return session
+
+
+def _recall(key: str):
+    """
+    Returns a search result kept in memory, or _MISSING.
+    """
+    with _memory_lock:
+        result = _memory.get(key, _MISSING)
+        if result is not _MISSING:
+            _memory.move_to_end(key)
+        return result
+
+
+def _remember(key: str, result) -> None:
+    """
+    Keeps a search result in memory, evicting the least recently used one
+    beyond MEMORY_SIZE results.
+    """
+    with _memory_lock:
+        _memory[key] = result
+        _memory.move_to_end(key)
+        if len(_memory) > MEMORY_SIZE:
+            _memory.popitem(last=False)
+
+
+def _make_key(namespace: str, values: list) -> str:
+    """
+    Hashes the search parameters into a cache key.
+    """
+    payload = json.dumps([namespace, values], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def load(namespace: str, values: list, is_miss=None):
+    """
+    Returns a result stored with the same namespace and values.
+    Parameters
+    ----------
+    namespace : str
+        Name identifying the kind of result.
+    values : list
+        Parameters the result depends on.
+    is_miss : Callable[[Any], bool] | None
+        Tells whether a stored result is empty, i.e. the track was missing
+        from the services. Empty results are not returned if
+        set_retry_misses is enabled.
+    Returns
+    -------
+    Any
+        Stored result, or None if there is none, it is empty and misses are
+        retried, or the caches are disabled.
+    """
+    if not _enabled:
+        return None
+    result = _lookups.get(_make_key(namespace, values))
+    if result is not None and _retry_misses and is_miss is not None \
+            and is_miss(result):
+        return None
+    return result
+
+
+def store(namespace: str, values: list, result, miss: bool = False) -> None:
+    """
+    Stores a result, to be returned by load with the same namespace and
+    values.
+    Parameters
+    ----------
+    namespace : str
+        Name identifying the kind of result.
+    values : list
+        Parameters the result depends on.
+    result : Any
+        Result to be stored.
+    miss : bool
+        Whether the result is empty, in which case it is kept for
+        MISS_EXPIRE_AFTER seconds only.
+    Returns
+    -------
+    None
+    """
+    if _enabled:
+        _lookups.set(_make_key(namespace, values), result,
+                     expire=MISS_EXPIRE_AFTER if miss else EXPIRE_AFTER)
+
+
+def cached(namespace: str, fields: tuple[str, ...]):
+    """
+    Decorator caching the result of a search method on disk. The key is built
+    from the given instance attributes and the arguments of the call, so the
+    decorated method must only depend on them. Empty results are cached as
+    well, for MISS_EXPIRE_AFTER seconds, so that missing tracks are not
+    searched again on every run, unless set_retry_misses is enabled.
+    Exceptions are not cached.
+    Parameters
+    ----------
+    namespace : str
+        Name identifying the decorated method in the cache.
+    fields : tuple[str, ...]
+        Names of the instance attributes the search depends on.
+    Returns
+    -------
+    Callable
+        The decorator.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not _enabled:
+                return method(self, *args, **kwargs)
+            key = _make_key(
+                namespace,
+                [[getattr(self, field) for field in fields], args, kwargs],
+            )
+            # results kept in memory were searched or validated in this run
+            result = _recall(key)
+            if result is not _MISSING:
+                return result
+            result = _lookups.get(key, default=_MISSING)
+            if result is not _MISSING and (result or not _retry_misses):
+                _remember(key, result)
+                return result
+            result = method(self, *args, **kwargs)
+            _lookups.set(key, result,
+                         expire=EXPIRE_AFTER if result else MISS_EXPIRE_AFTER)
+            _remember(key, result)
+            return result
+        return wrapper
+    return decorator
@@ -12,7 +12,39 @@ track number.
 the Deezer API.
 """
 
+from itertools import islice
+
 import deezer
+import numpy as np
+
+from .cache import cached_session
+from .musicbrainz_links import USER_AGENT
+from .throttling import RateLimitedAdapter, RateLimiter
+
+# HTTP-level cache shared by every Deezer request, so that lazily fetched
+# resources (e.g. artist and album of a track) are cached as well.
+_CLIENT = deezer.Client()
+_CLIENT.session = cached_session("deezer_http")
+_CLIENT.session.headers["User-Agent"] = USER_AGENT
+# Deezer allows 50 requests every 5 seconds
+_ADAPTER = RateLimitedAdapter(RateLimiter(50, 5.0))
+_CLIENT.session.mount("https://", _ADAPTER)
+_CLIENT.session.mount("http://", _ADAPTER)
+
+# below this number of results, a plain Python scan is faster than NumPy
+_VECTORIZE_THRESHOLD = 32
+
+# marks a best match that has not been searched yet
+_UNSET = object()
+
+
+def _normalize(value: str | None) -> str | None:
+    """
+    Normalizes a search term, so that the queries differing only in case or
+    spacing are the same request, served by the HTTP cache. The Deezer search
+    ignores both.
+    """
+    return " ".join(value.lower().split()) if value else value
 
 
 class DeezerAlign:
@@ -20,6 +52,20 @@ class DeezerAlign:
     Search for a track on Deezer and return its data.
     """
 
+    __slots__ = (
+        "artist",
+        "album",
+        "track",
+        "track_number",
+        "duration",
+        "isrc",
+        "strict",
+        "fuzzy",
+        "deezer_client",
+        "_best_match",
+        "_results",
+    )
+
     def __init__(
         self,
         artist: str | None = None,
@@ -51,13 +97,20 @@ class DeezerAlign:
             track on Deezer. If False, returns the best match.
             Default is False.
         fuzzy : bool
-            If True, uses fuzzy matching to find the best match.
+            If True, Deezer also returns approximate matches of the search
+            terms; if False, its strict mode only returns exact matches, a
+            smaller result set. Unlike strict, it does not filter the results
+            on this side.
             Default is True.
         Raises
         ------
         ValueError
             If no parameters are passed.
         """
+        if not any((artist, album, track, isrc)):
+            raise ValueError(
+                "At least one of artist, album, track or isrc is required."
+            )
         self.artist = artist
         self.album = album
         if self.album and not strict and " " in self.album:
@@ -65,17 +118,17 @@ class DeezerAlign:
         self.track = track
         self.track_number = track_number
         self.duration = duration
-        if isinstance(isrc, str):
-            self.isrc = [isrc]
-        self.isrc = isrc
+        self.isrc = [isrc] if isinstance(isrc, str) else isrc
         self.strict = strict
-        self.fuzzy = False if fuzzy is True else True
+        self.fuzzy = fuzzy
 
-        # connect to Deezer API
-        self.deezer_client = deezer.Client()
+        # the Deezer client is attached on the first request
+        self.deezer_client = None
 
-        # return best match
-        self.best_match = self.best_match(duration_threshold=3)  # type: ignore
+        # the best match is searched on first use
+        self._best_match = _UNSET
+        # results of the searches already performed, by limit
+        self._results: dict[int | None, list[deezer.Track] | None] = {}
 
     def _get_data(self, limit: int | None = None) -> list[deezer.Track] | None:
         """
@@ -93,71 +146,131 @@ class DeezerAlign:
         ValueError
             If the track is not found.
         """
+        if limit not in self._results:
+            # the unlimited results, if already retrieved, contain the others
+            if None in self._results:
+                results = self._results[None]
+                self._results[limit] = results[:limit] if results else results
+            else:
+                self._results[limit] = self._search(limit)
+        return self._results[limit]
+
+    def _search(self, limit: int | None = None) -> list[deezer.Track] | None:
+        """
+        Perform the search on Deezer.
+        Parameters
+        ----------
+        limit : int
+            Maximum number of results to return.
+        Returns
+        -------
+        list[deezer.resources.Track]
+            List of Track objects, or None if the track is not found.
+        """
+        self.deezer_client = self.deezer_client or _CLIENT
+        if limit is not None:
+            return self._search_page(limit)
         results = self.deezer_client.search(
-            track=self.track,
-            artist=self.artist,
-            album=self.album,
-            strict=self.fuzzy,
+            track=_normalize(self.track),
+            artist=_normalize(self.artist),
+            album=_normalize(self.album),
+            strict=not self.fuzzy,
         )
         try:
             if len(results) == 0:
                 return None
-            return [res for res in results][:limit]
+            # only fetch the pages of results that are needed
+            return list(islice(results, limit))
         except Exception:
             return None
 
-    def _filter_duration(
+    def _search_page(self, limit: int) -> list[deezer.Track] | None:
+        """
+        Perform the search on Deezer, requesting only the first results
+        instead of a whole page.
+        Parameters
+        ----------
+        limit : int
+            Maximum number of results to return.
+        Returns
+        -------
+        list[deezer.resources.Track]
+            List of Track objects, or None if the track is not found.
+        """
+        # same advanced query as built by deezer.Client.search
+        fields = (("artist", self.artist), ("album", self.album),
+                  ("track", self.track))
+        params = {
+            "q": " ".join(f'{field}:"{_normalize(value)}"'
+                          for field, value in fields if value),
+            "limit": limit,
+        }
+        if not self.fuzzy:
+            params["strict"] = "on"
+        try:
+            results = self.deezer_client.request(  # type: ignore
+                method="GET", path="search", **params
+            )
+        except Exception:
+            return None
+        return list(results) or None
+
+    def _filter(
         self, results: list[deezer.Track], duration_threshold: int
     ) -> list[deezer.Track]:
         """
-        Filter results based on the duration of the track.
+        Filter results based on the duration and the track number of the
+        track, in a single pass over the results. Both filters only apply to
+        strict searches.
         Parameters
         ----------
         results : list[deezer.resources.Track]
             List of Track objects, each of which contains the data of a track.
         duration_threshold : int
             Threshold for the duration difference between the best match and
-            the provided duration. If the difference is greater than the
-            threshold, an error is raised.
+            the provided duration.
         Returns
         -------
         list[deezer.resources.Track]
             List of Track objects, each of which contains the data of a track,
-            filtered by duration. Only tracks with a duration within the
-            threshold are returned.
+            filtered by duration and track number. Only tracks with a duration
+            within the threshold and a track number matching the provided one
+            are returned.
         """
-        if self.duration is None or self.strict is False:
+        by_duration = self.strict and self.duration is not None
+        by_number = self.strict and self.track_number is not None
+        if not by_duration and not by_number:
             return results
 
-        print(results)
-
         return [
             res
             for res in results
-            if abs(res.duration - self.duration) <= duration_threshold
+            if (not by_duration
+                or abs(res.duration - self.duration) <= duration_threshold)
+            and (not by_number or res.track_position == self.track_number)
         ]
 
-    def _filter_track_number(
-        self, results: list[deezer.Track]
-    ) -> list[deezer.Track]:
+    def _closest_duration(self, results: list[deezer.Track]) -> deezer.Track:
         """
-        Filter results based on the track number of the track.
+        Return the result with the closest duration to the provided one.
         Parameters
         ----------
         results : list[deezer.resources.Track]
-            List of Track objects, each of which contains the data of a track.
+            Non-empty list of Track objects.
         Returns
         -------
-        list[deezer.resources.Track]
-            List of Track objects, each of which contains the data of a track,
-            filtered by track number. Only tracks with a track number matching
-            the provided one are returned.
-        """
-        if self.track_number is None or self.strict is False:
-            return results
-
-        return [res for res in results
-                if res.track_position == self.track_number]
+        deezer.resources.Track
+            Track whose duration is the closest to the provided one, or the
+            first result if no duration is provided.
+        """
+        if self.duration is None or len(results) == 1:
+            return results[0]
+        if len(results) < _VECTORIZE_THRESHOLD:
+            return min(results, key=lambda res: abs(res.duration - self.duration))
+        durations = np.fromiter(
+            (res.duration for res in results), dtype=np.int32, count=len(results)
+        )
+        return results[int(np.abs(durations - self.duration).argmin())]
 
     def _get_track_by_isrc(self) -> deezer.Track | None:
         """
@@ -169,7 +282,9 @@ class DeezerAlign:
         """
         if not self.isrc:
             return None
-        for code in self.isrc:
+        self.deezer_client = self.deezer_client or _CLIENT
+        # the first code found is returned, so each code is requested once
+        for code in dict.fromkeys(self.isrc):
             try:
                 return self.deezer_client.request(  # type: ignore
                     method="GET",
@@ -196,24 +311,38 @@ class DeezerAlign:
         dict
             Dictionary containing the data of the best match.
         """
-        if not self.duration and not self.track_number and not self.isrc:
+        # the ISRC lookup is direct, the search is only needed if it fails
+        if self.isrc:
+            track = self._get_track_by_isrc()
+            if track is not None or not any((self.artist, self.album,
+                                             self.track)):
+                return track
+
+        if not self.duration and not self.track_number:
             result = self._get_data(limit=1)
             return result[0] if result else None
 
-        if self.isrc:
-            return self._get_track_by_isrc()
-
         # if duration or track number exist, get all results
         results = self._get_data()
-        print(results)
 
         if results:
-            # filter results by duration
-            results = self._filter_duration(results, duration_threshold)
-            # filter results by track number
-            results = self._filter_track_number(results)
+            # filter results by duration and track number
+            results = self._filter(results, duration_threshold)
+
+            return self._closest_duration(results) if results else None
 
-            return results[0] if results else None
+    def _resolve(self) -> deezer.Track | None:
+        """
+        Return the best match, searching for it on first use only, so that
+        all the getters share a single search.
+        Returns
+        -------
+        deezer.resources.Track
+            Best match, or None if no track is found.
+        """
+        if self._best_match is _UNSET:
+            self._best_match = self.best_match(duration_threshold=3)
+        return self._best_match
 
     def get_link(self) -> str | None:
         """
@@ -223,10 +352,9 @@ class DeezerAlign:
         str
             Deezer link of the best match.
         """
-        try:
-            return self.best_match.link
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "link", None)
 
     def get_duration(self) -> int | None:
         """
@@ -236,10 +364,9 @@ class DeezerAlign:
         int
             Duration of the best match in seconds.
         """
-        try:
-            return self.best_match.duration
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "duration", None)
 
     def get_id(self) -> int | None:
         """
@@ -249,10 +376,9 @@ class DeezerAlign:
         int
             Deezer ID of the best match.
         """
-        try:
-            return self.best_match.id
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "id", None)
 
     def get_preview(self) -> str | None:
         """
@@ -262,8 +388,9 @@ class DeezerAlign:
             str
                 Deezer preview of the best match.
         """
-        if self.best_match():
-            return self.best_match.preview
+        if (best_match := self._resolve()) is None:
+            return None
+        return getattr(best_match, "preview", None)
 
     def get_artist(self) -> deezer.Artist | None:
         """
@@ -273,10 +400,9 @@ class DeezerAlign:
             deezer.resources.Artist
                 Deezer artist of the best match.
         """
-        try:
-            return self.best_match.artist
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "artist", None)
 
     def get_artist_name(self) -> str | None:
         """
@@ -286,10 +412,9 @@ class DeezerAlign:
             str
                 Deezer artist name of the best match.
         """
-        try:
-            return self.get_artist.name
-        except AttributeError:
+        if (artist := self.get_artist()) is None:
             return None
+        return getattr(artist, "name", None)
 
     def get_album(self) -> deezer.Album | None:
         """
@@ -299,10 +424,9 @@ class DeezerAlign:
             deezer.resources.Album
                 Deezer album of the best match.
         """
-        try:
-            return self.best_match.album
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "album", None)
 
     def get_album_title(self) -> str | None:
         """
@@ -312,10 +436,9 @@ class DeezerAlign:
             str
                 Deezer album title of the best match.
         """
-        try:
-            return self.get_album.title
-        except AttributeError:
+        if (album := self.get_album()) is None:
             return None
+        return getattr(album, "title", None)
 
     def get_track(self) -> str | None:
         """
@@ -325,10 +448,9 @@ class DeezerAlign:
             str
                 Deezer track of the best match.
         """
-        try:
-            return self.best_match.title_short
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "title_short", None)
 
     def get_rank(self) -> int | None:
         """
@@ -338,10 +460,9 @@ class DeezerAlign:
             int
                 Deezer rank of the best match.
         """
-        try:
-            return self.best_match.rank
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "rank", None)
 
     def get_track_number(self) -> int | None:
         """
@@ -351,10 +472,9 @@ class DeezerAlign:
             int
                 Deezer track number of the best match.
         """
-        try:
-            return self.best_match.track_position
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "track_position", None)
 
     def get_release_date(self) -> str | None:
         """
@@ -364,10 +484,10 @@ class DeezerAlign:
             str
                 Deezer release date of the best match.
         """
-        try:
-            return self.best_match.release_date.strftime("%Y")
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        release_date = getattr(best_match, "release_date", None)
+        return None if release_date is None else release_date.strftime("%Y")
 
     def get_bpm(self) -> float | None:
         """
@@ -377,10 +497,9 @@ class DeezerAlign:
             float
                 Deezer bpm of the best match.
         """
-        try:
-            return self.best_match.bpm
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "bpm", None)
 
     def get_isrc(self) -> str | None:
         """
@@ -390,10 +509,9 @@ class DeezerAlign:
             str
                 Deezer isrc of the best match.
         """
-        try:
-            return self.best_match.isrc
-        except AttributeError:
+        if (best_match := self._resolve()) is None:
             return None
+        return getattr(best_match, "isrc", None)
 
 
 if __name__ == "__main__":
@@ -7,18 +7,19 @@ repositories:
     - AcousticBrainz
 
 The scripts are based on the following libraries:
-    - musicbrainzngs
+    - requests (MusicBrainz web service)
     - deezer-python
     - youtube-search-python
 
 The library will be expanded in the future to support more repositories, such
 as Spotify, YouTube, etc.
 """
-import musicbrainzngs.musicbrainz
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 
 from .acousticbrainz_links import acousticbrainz_link
 from .deezer_links import DeezerAlign
-from .musicbrainz_links import MusicBrainzAlign
+from .musicbrainz_links import BATCH_SIZE, MusicBrainzAlign
 from .youtube_links import YouTubeAlign
 
 
@@ -72,6 +73,8 @@ class Align:
         duration: float | None = None,
         isrc: str | list | None = None,
         strict: bool = False,
+        mb_recording: dict | None = None,
+        prefetch: bool = False,
     ):
         """
         Initializes the class by taking the metadata of the track and the
@@ -95,6 +98,12 @@ class Align:
             ISRC code.
         strict : bool
             Whether to use strict search or not.
+        mb_recording : dict
+            MusicBrainz recording already retrieved for the track, e.g. by
+            MusicBrainzAlign.batch_lookup.
+        prefetch : bool
+            Whether to retrieve the best matches on all the services at once,
+            see prefetch_all.
 
         Returns
         -------
@@ -116,45 +125,141 @@ class Align:
         self.mb_link = MusicBrainzAlign(
             mbid_track=self.mbid_track,
             mbid_release=self.mbid_release,
-            artist=self.artist,
-            album=self.album,
-            track=self.track,
-            track_number=self.track_number,
-            duration=self.duration,
-            isrc=self.isrc,
-            strict=self.strict,
+            recording=mb_recording,
+            **self._search_params(),
         )
 
         # check that the MusicBrainz ID is valid
         if self.mbid_track:
-            try:
+            if self.mb_link.get_best_match is None:
+                self.mbid_track = None
+            else:
                 self.isrc = self.mb_link.get_isrc()
                 self.track = self.mb_link.get_track() if not self.track else self.track
                 self.artist = (
                     self.mb_link.get_artist() if not self.artist else self.artist
                 )
-            except musicbrainzngs.musicbrainz.ResponseError:
-                self.mbid_track = None
 
-        self.dz_link = DeezerAlign(
-            artist=self.artist,
-            album=self.album,
-            track=self.track,
-            track_number=self.track_number,
-            duration=self.duration,
-            isrc=self.isrc,
-            strict=False,
-        )
+        if prefetch:
+            self.prefetch_all()
 
-        self.yt_link = YouTubeAlign(
-            artist=self.artist,
-            album=self.album,
-            track=self.track,
-            track_number=self.track_number,
-            duration=self.duration,
-            isrc=self.isrc,
-            strict=False,
-        )
+    def _search_params(self) -> dict:
+        """
+        Returns the search parameters shared by all the services, taken from
+        the current metadata of the track.
+
+        Returns
+        -------
+        dict
+            Keyword arguments of the search classes.
+        """
+        return {
+            "artist": self.artist,
+            "album": self.album,
+            "track": self.track,
+            "track_number": self.track_number,
+            "duration": self.duration,
+            "isrc": self.isrc,
+            "strict": self.strict,
+        }
+
+    @cached_property
+    def dz_link(self) -> DeezerAlign | None:
+        """
+        Deezer search of the track, created on first use, so that the callers
+        only needing MusicBrainz data do not set it up.
+
+        Returns
+        -------
+        DeezerAlign | None
+            Deezer search of the track, or None if there is nothing to search
+            for, i.e. no artist, album, track or ISRC.
+        """
+        try:
+            # not strict, regardless of the MusicBrainz search
+            return DeezerAlign(**{**self._search_params(), "strict": False})
+        except ValueError:
+            return None
+
+    def _deezer(self, getter: str):
+        """
+        Calls a getter of the Deezer search of the track.
+
+        Parameters
+        ----------
+        getter : str
+            Name of the DeezerAlign getter.
+
+        Returns
+        -------
+        Any
+            Value returned by the getter, or None if there is no Deezer
+            search.
+        """
+        if self.dz_link is None:
+            return None
+        return getattr(self.dz_link, getter)()
+
+    @cached_property
+    def yt_link(self) -> YouTubeAlign:
+        """
+        YouTube Music search of the track, created on first use.
+
+        Returns
+        -------
+        YouTubeAlign
+            YouTube Music search of the track.
+        """
+        # not strict, regardless of the MusicBrainz search
+        return YouTubeAlign(**{**self._search_params(), "strict": False})
+
+    def prefetch_all(self) -> None:
+        """
+        Retrieves the best matches on MusicBrainz, Deezer and YouTube Music
+        concurrently, so that the getters do not wait for the services one
+        after the other.
+
+        Returns
+        -------
+        None
+        """
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(lambda: self.mb_link.get_best_match),
+                executor.submit(self._deezer, "get_id"),
+                executor.submit(self.yt_link.get_best_match),
+            ]
+        for future in futures:
+            future.result()
+
+    def resolve(self) -> dict:
+        """
+        Retrieves all the metadata and links of the track at once, prefetching
+        the best matches on all the services. This is the preferred entry
+        point for batch callers, which then serialize a plain dictionary.
+        The BPM is left out, as it requires a further Deezer request.
+
+        Returns
+        -------
+        dict
+            Metadata and links of the track, keyed by the name of the
+            corresponding getter without the "get_" prefix.
+        """
+        self.prefetch_all()
+        return {
+            "artist": self.get_artist(),
+            "album": self.get_album(),
+            "track": self.get_track(),
+            "track_number": self.get_track_number(),
+            "duration": self.get_duration(),
+            "isrc": self.get_isrc(),
+            "release_date": self.get_release_date(),
+            "mbid": self.get_mbid(),
+            "deezer_id": self.get_deezer_id(),
+            "deezer_link": self.get_deezer_link(),
+            "youtube_link": self.get_youtube_link(),
+            "acousticbrainz_link": self.get_acousticbrainz_link(),
+        }
 
     def get_artist(self) -> str | None:
         """
@@ -174,11 +279,12 @@ class Align:
 
         # check iteratively on all the implemented platforms
         if artist is None:
-            artist = self.dz_link.get_artist_name()
-            if artist is None:
-                artist = self.mb_link.get_artist()
-                if artist is None:
-                    artist = self.yt_link.get_youtube_artist()
+            artist = self._deezer("get_artist_name")
+        # MusicBrainz has already been checked if the ID is known
+        if artist is None and not self.mbid_track:
+            artist = self.mb_link.get_artist()
+        if artist is None:
+            artist = self.yt_link.get_youtube_artist()
         return artist
 
     def get_album(self) -> str | None:
@@ -199,11 +305,12 @@ class Align:
 
         # check iteratively on all the implemented platforms
         if album is None:
-            album = self.dz_link.get_album_title()
-            if album is None:
-                album = self.mb_link.get_album()
-                if album is None:
-                    album = self.yt_link.get_youtube_album()
+            album = self._deezer("get_album_title")
+        # MusicBrainz has already been checked if the ID is known
+        if album is None and not self.mbid_track:
+            album = self.mb_link.get_album()
+        if album is None:
+            album = self.yt_link.get_youtube_album()
         return album
 
     def get_track(self) -> str | None:
@@ -224,11 +331,12 @@ class Align:
 
         # check iteratively on all the implemented platforms
         if track is None:
-            track = self.dz_link.get_track()
-            if track is None:
-                track = self.mb_link.get_track()
-                if track is None:
-                    track = self.yt_link.get_youtube_title()
+            track = self._deezer("get_track")
+        # MusicBrainz has already been checked if the ID is known
+        if track is None and not self.mbid_track:
+            track = self.mb_link.get_track()
+        if track is None:
+            track = self.yt_link.get_youtube_title()
         return track
 
     def get_track_number(self) -> int | None:
@@ -249,9 +357,10 @@ class Align:
 
         # check iteratively on all the implemented platforms
         if track_number is None:
-            track_number = self.dz_link.get_track_number()
-            if track_number is None:
-                track_number = self.mb_link.get_track_number()
+            track_number = self._deezer("get_track_number")
+        # MusicBrainz has already been checked if the ID is known
+        if track_number is None and not self.mbid_track:
+            track_number = self.mb_link.get_track_number()
         return track_number
 
     def get_duration(self) -> float | None:
@@ -272,11 +381,12 @@ class Align:
 
         # check iteratively on all the implemented platforms
         if duration is None:
-            duration = self.dz_link.get_duration()
-            if duration is None:
-                duration = self.mb_link.get_duration()
-                if duration is None:
-                    duration = self.yt_link.get_youtube_duration()
+            duration = self._deezer("get_duration")
+        # MusicBrainz has already been checked if the ID is known
+        if duration is None and not self.mbid_track:
+            duration = self.mb_link.get_duration()
+        if duration is None:
+            duration = self.yt_link.get_youtube_duration()
         return duration
 
     def get_isrc(self) -> str | list[str] | None:
@@ -296,9 +406,10 @@ class Align:
 
         # check on deezer
         if isrc is None:
-            isrc = self.dz_link.get_isrc()
-            if isrc is None:
-                isrc = self.mb_link.get_isrc()
+            isrc = self._deezer("get_isrc")
+        # MusicBrainz has already been checked if the ID is known
+        if isrc is None and not self.mbid_track:
+            isrc = self.mb_link.get_isrc()
         return isrc
 
     def get_release_date(self) -> str | None:
@@ -311,7 +422,7 @@ class Align:
         """
         if self.mbid_track:
             return self.mb_link.get_release_date()
-        return self.dz_link.get_release_date()
+        return self._deezer("get_release_date")
 
     def get_mbid(self) -> str | None:
         """
@@ -333,7 +444,7 @@ class Align:
         int
             Deezer ID.
         """
-        return self.dz_link.get_id()
+        return self._deezer("get_id")
 
     def get_deezer_link(self) -> str | None:
         """
@@ -343,7 +454,7 @@ class Align:
         str
             Deezer link.
         """
-        return self.dz_link.get_link()
+        return self._deezer("get_link")
 
     def get_youtube_link(self) -> str | None:
         """
@@ -363,7 +474,7 @@ class Align:
         float
             BPM.
         """
-        return self.dz_link.get_bpm()
+        return self._deezer("get_bpm")
 
     def get_acousticbrainz_link(self) -> str | None:
         """
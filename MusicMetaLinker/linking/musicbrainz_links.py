@@ -1,9 +1,184 @@
 """
 Script for creating links between MusicBrainz given the extracted information
 from the JAMS files.
+The MusicBrainz web service is queried directly through its JSON endpoints,
+whose responses are decoded with orjson.
 """
 
-import musicbrainzngs as mb
+import re
+import orjson
+import requests
+
+from .cache import cached
+from .throttling import RateLimitedAdapter, RateLimiter
+
+API_URL = "https://musicbrainz.org/ws/2/"
+USER_AGENT = "elka/0.1 ( https://elka.com )"
+
+# shared by all the lookups, so that the connections are kept alive;
+# MusicBrainz allows one request per second
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT,
+                         "Accept": "application/json"})
+_SESSION.mount("https://", RateLimitedAdapter(RateLimiter(1, 1.0)))
+
+# special characters of the Lucene query syntax
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]\^"~*?:\\/])')
+
+# marks a best match that has not been searched yet
+_UNSET = object()
+
+# attributes that determine the result of the search
+_SEARCH_FIELDS = frozenset((
+    "mbid_track",
+    "mbid_release",
+    "artist",
+    "album",
+    "track",
+    "track_number",
+    "duration",
+    "isrc",
+    "strict",
+    "limit",
+))
+
+# maximum number of identifiers combined in a single search query
+BATCH_SIZE = 25
+
+# maximum difference in seconds between the duration of a track and of a
+# recording matched by name
+DURATION_TOLERANCE = 3.0
+
+# subqueries needed by the getters that do not read the releases
+BASIC_INCLUDES = ("artists", "isrcs")
+RELEASE_INCLUDES = ("artists", "isrcs", "releases")
+# releases kept when looking up a recording by MBID
+RELEASE_STATUS = "official"
+RELEASE_TYPES = ("album", "ep", "single")
+
+
+def _escape(value) -> str:
+    """
+    Escapes the special characters of the Lucene query syntax in a value.
+    """
+    return _LUCENE_SPECIAL.sub(r"\\\1", str(value))
+
+
+def _normalize(value: str | None) -> str:
+    """
+    Normalizes a title or a name, to compare it regardless of case and
+    spacing.
+    """
+    return " ".join(value.lower().split()) if value else ""
+
+
+def _artist_credit(recording: dict) -> str:
+    """
+    Joins the artist credit of a recording in a single name.
+    """
+    return "".join(credit["name"] + credit.get("joinphrase", "")
+                   for credit in recording.get("artist-credit", []))
+
+
+def _same_release(item: dict, recording: dict) -> bool:
+    """
+    Tells whether a recording found by name lasts as long as the track and
+    appears on its album, when they are known.
+    """
+    duration, length = item.get("duration"), recording.get("length")
+    if duration and length is not None and \
+            abs(length / 1000 - duration) > DURATION_TOLERANCE:
+        return False
+    album = _normalize(item.get("album"))
+    return not album or any(_normalize(release.get("title")) == album
+                            for release in recording.get("releases", []))
+
+
+def _official_releases(recording: dict) -> dict:
+    """
+    Filters the releases of a recording found by a search to the official
+    albums, EPs and singles, as the lookups by MBID do.
+    """
+    releases = [release for release in recording.get("releases", [])
+                if (release.get("status") or "").lower() == RELEASE_STATUS
+                and (release.get("release-group", {}).get("primary-type")
+                     or "").lower() in RELEASE_TYPES]
+    return {**recording, "releases": releases}
+
+
+def _ws_get(path: str,
+            params: dict,
+            session: requests.Session | None = None) -> dict | None:
+    """
+    Queries the MusicBrainz web service.
+    Parameters
+    ----------
+    path : str
+        Path of the resource, relative to the web service root.
+    params : dict
+        Query parameters.
+    session : requests.Session | None
+        Session used for the request, defaults to the module session.
+    Returns
+    -------
+    dict
+        Decoded JSON response, or None if the resource does not exist.
+    Raises
+    ------
+    requests.HTTPError
+        If the web service returns an error other than 400 or 404.
+    """
+    response = (session or _SESSION).get(API_URL + path,
+                                         params={**params, "fmt": "json"},
+                                         timeout=30)
+    if response.status_code in (400, 404):
+        return None
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+def _search_recordings(fields: dict,
+                       strict: bool = False,
+                       limit: int | None = None,
+                       query: str = "",
+                       session: requests.Session | None = None) -> list[dict]:
+    """
+    Searches for recordings, building the Lucene query from the given fields.
+    Parameters
+    ----------
+    fields : dict
+        Search fields (e.g. "recording", "artist", "release") and their
+        values. Empty values are ignored.
+    strict : bool
+        If True, all the fields must match exactly. Otherwise, any field can
+        match.
+    limit : int
+        Maximum number of results.
+    query : str
+        Raw Lucene query, prepended to the fields.
+    session : requests.Session | None
+        Session used for the request, defaults to the module session.
+    Returns
+    -------
+    list[dict]
+        List of recordings.
+    """
+    parts = [query] if query else []
+    for key, value in fields.items():
+        if value is None or value == "":
+            continue
+        value = _escape(value)
+        if strict:
+            parts.append(f'{key}:"{value}"')
+        else:
+            parts.append(f"{key}:({value.lower()})")
+    if not parts:
+        return []
+    params = {"query": (" AND " if strict else " ").join(parts)}
+    if limit:
+        params["limit"] = limit
+    results = _ws_get("recording", params, session)
+    return results["recordings"] if results else []
 
 
 class MusicBrainzAlign:
@@ -20,6 +195,10 @@ class MusicBrainzAlign:
         duration (float): The duration of the track.
         isrc (str): The ISRC of the track.
         strict (bool): Whether to use strict matching or not.
+        recording (dict): A recording already retrieved for the track, e.g.
+            by batch_lookup. If provided, no search is performed.
+        session (requests.Session): The session used for the requests,
+            defaults to the session shared by all the lookups.
 
     Attributes:
         mbid (str): The MusicBrainz ID of the track.
@@ -33,6 +212,8 @@ class MusicBrainzAlign:
         limit (int): Whether to limit the search to a smaller set of candidates for faster querying.
     """
 
+    __slots__ = tuple(sorted(_SEARCH_FIELDS)) + ("session", "_cached_best")
+
     def __init__(
             self,
             mbid_track: str | None = None,
@@ -44,9 +225,11 @@ class MusicBrainzAlign:
             duration: float | None = None,
             isrc: list | str | None = None,
             strict: bool = False,
-            limit: int | None = None
+            limit: int | None = None,
+            recording: dict | None = None,
+            session: requests.Session | None = None,
             ):
-        
+
         self.mbid_track = mbid_track
         self.mbid_release = mbid_release
         self.artist = artist
@@ -59,50 +242,151 @@ class MusicBrainzAlign:
             self.isrc = [self.isrc]
         self.strict = strict
         self.limit = limit
+        self.session = session or _SESSION
+        self._cached_best = _UNSET if recording is None else recording
+
+    def __setattr__(self, name, value) -> None:
+        # changing a search parameter invalidates the cached best match
+        if name in _SEARCH_FIELDS:
+            super().__setattr__("_cached_best", _UNSET)
+        super().__setattr__(name, value)
+
+    @classmethod
+    def batch_lookup(cls, items: list[dict]) -> dict[int, dict]:
+        """
+        Retrieves the recordings of several tracks with as few requests as
+        possible, by combining up to BATCH_SIZE tracks in a single search
+        query (e.g. rid:mbid1 OR rid:mbid2 OR ...).
+        Parameters
+        ----------
+        items : list[dict]
+            Search parameters of each track. Tracks are looked up by their
+            "mbid_track" if available, otherwise by their "isrc" (a code or a
+            list of codes), otherwise by their "track" and "artist" names.
+            Tracks looked up by name only match recordings with the same
+            title and artist credit, regardless of case and spacing, having
+            an ISRC, lasting their "duration" in seconds and appearing on
+            their "album", when these are known. Tracks with an
+            "mbid_release" are ignored, as the recording is then looked up
+            among the tracks of the release, and so are the other tracks.
+        Returns
+        -------
+        recordings : dict[int, dict]
+            Recordings found, indexed by the position of the corresponding
+            item, with their releases filtered as the lookups by MBID do.
+            Tracks that are not found are missing from the dictionary.
+        """
+        by_mbid: dict[str, list[int]] = {}
+        by_isrc: dict[str, list[int]] = {}
+        by_name: dict[tuple[str, str], list[int]] = {}
+        for idx, item in enumerate(items):
+            if item.get("mbid_release"):
+                continue
+            if item.get("mbid_track"):
+                by_mbid.setdefault(item["mbid_track"], []).append(idx)
+            elif item.get("isrc"):
+                isrc = item["isrc"]
+                for code in [isrc] if isinstance(isrc, str) else isrc:
+                    by_isrc.setdefault(code, []).append(idx)
+            elif item.get("track") and item.get("artist"):
+                by_name.setdefault((item["track"], item["artist"]),
+                                   []).append(idx)
+
+        recordings: dict[int, dict] = {}
+        for recording in cls._batch_search(
+                [f"rid:{mbid}" for mbid in by_mbid]):
+            for idx in by_mbid.get(recording["id"], []):
+                recordings.setdefault(idx, recording)
+        for recording in cls._batch_search(
+                [f"isrc:{code}" for code in by_isrc]):
+            for code in recording.get("isrcs", []):
+                for idx in by_isrc.get(code, []):
+                    recordings.setdefault(idx, recording)
 
-        mb.set_useragent("elka", "0.1", "https://elka.com")
+        names: dict[tuple[str, str], list[int]] = {}
+        for (track, artist), indices in by_name.items():
+            names.setdefault((_normalize(track), _normalize(artist)),
+                             []).extend(indices)
+        for recording in cls._batch_search(
+                [f'(recording:"{_escape(track)}" AND artist:"{_escape(artist)}")'
+                 for track, artist in by_name]):
+            if not recording.get("isrcs"):
+                continue
+            key = (_normalize(recording.get("title")),
+                   _normalize(_artist_credit(recording)))
+            for idx in names.get(key, []):
+                if _same_release(items[idx], recording):
+                    recordings.setdefault(idx, recording)
+        return {idx: _official_releases(recording)
+                for idx, recording in recordings.items()}
 
-        self.best_match = self.get_best_match
+    @staticmethod
+    def _batch_search(clauses: list[str]) -> list[dict]:
+        """
+        Searches for all the recordings matching any of the clauses, in
+        chunks of BATCH_SIZE clauses per request.
+        Parameters
+        ----------
+        clauses : list[str]
+            Lucene clauses to be searched, e.g. "rid:mbid".
+        Returns
+        -------
+        recordings : list[dict]
+            Recordings matching any of the clauses.
+        """
+        recordings = []
+        for start in range(0, len(clauses), BATCH_SIZE):
+            query = " OR ".join(clauses[start:start + BATCH_SIZE])
+            try:
+                recordings.extend(_search_recordings({}, query=query, limit=100))
+            except requests.RequestException:
+                continue
+        return recordings
 
-    def _search_by_isrc(self) -> dict | None:
+    @cached("musicbrainz.isrc", ("isrc",))
+    def _search_by_isrc(self) -> list | None:
         """
         Searches for the track in the MusicBrainz database by ISRC code.
         Returns
         -------
-        search_results : dict
-            Dictionary containing the search results.
+        search_results : list
+            List of the recordings of the first ISRC code found.
         """
         if self.isrc:
             for isrc in self.isrc:
-                try:
-                    isrc_result = mb.get_recordings_by_isrc(
-                        isrc=isrc,
-                        includes=["artists", "releases", "isrcs"],
-                        release_status=["official"]
-                    )
-                    return isrc_result
-                except mb.ResponseError:
-                    return None
-
-    def _search_by_mbid(self) -> dict | None:
+                isrc_result = _ws_get(
+                    f"isrc/{isrc}",
+                    {"inc": "+".join(RELEASE_INCLUDES), "status": "official"},
+                    self.session,
+                )
+                if isrc_result and isrc_result.get("recordings"):
+                    return isrc_result["recordings"]
+        return None
+
+    @cached("musicbrainz.mbid", ("mbid_track",))
+    def _search_by_mbid(self,
+                        includes: tuple[str, ...] = BASIC_INCLUDES
+                        ) -> dict | None:
         """
         Searches for the track in the MusicBrainz database by MBID.
+        Parameters
+        ----------
+        includes : tuple[str, ...]
+            Subqueries to be included in the response. Releases are filtered
+            to official albums, EPs and singles.
         Returns
         -------
         search_results : dict
             Dictionary containing the search results.
         """
-        try:
-            mbid_results = mb.get_recording_by_id(
-                id=self.mbid_track,
-                includes=["artists", "releases", "isrcs", "discids", "url-rels"],
-                release_status=["official"],
-                release_type=["album", "ep", "single"],
-            )
-            return mbid_results
-        except mb.ResponseError:
-            return None
+        params = {"inc": "+".join(includes)}
+        if "releases" in includes:
+            params.update({"status": RELEASE_STATUS,
+                           "type": "|".join(RELEASE_TYPES)})
+        return _ws_get(f"recording/{self.mbid_track}", params, self.session)
 
+    @cached("musicbrainz.release", ("track", "artist", "album", "duration",
+                                    "track_number", "strict", "mbid_release"))
     def _get_track_mbid_from_release(self) -> str | None:
         """
         Searches for the track in the MusicBrainz database by MBID.
@@ -111,25 +395,25 @@ class MusicBrainzAlign:
         search_results : dict
             Dictionary containing the search results.
         """
-        # check if the id is a link, in case 
-        mbid_results = mb.search_recordings(
-            recording=self.track,
-            artist=self.artist,
-            release=self.album,
-            dur=self.duration,
-            tnum=self.track_number,
+        recordings = _search_recordings(
+            {"recording": self.track,
+             "artist": self.artist,
+             "release": self.album,
+             "dur": self.duration,
+             "tnum": self.track_number,
+             "reid": self.mbid_release},
             strict=self.strict,
-            rid=self.mbid_release,
+            session=self.session,
         )
-        
-        if mbid_results['recording-list']:
-            recordings = mbid_results["recording-list"]
-            for recording in recordings:
-                release_list_ids = [release["id"] for release in recording["release-list"]]
-                if self.mbid_release in release_list_ids:
-                    return recording["id"]
+        for recording in recordings:
+            release_list_ids = [release["id"]
+                                for release in recording.get("releases", [])]
+            if self.mbid_release in release_list_ids:
+                return recording["id"]
         return None
 
+    @cached("musicbrainz.search", ("track", "artist", "album", "duration",
+                                   "track_number", "strict", "limit"))
     def _search(self):
         """
         Searches for the track in the MusicBrainz database.
@@ -138,16 +422,16 @@ class MusicBrainzAlign:
         search_results : dict
             Dictionary containing the search results.
         """
-        search_results = mb.search_recordings(
-            recording=self.track,
-            artist=self.artist,
-            release=self.album,
-            dur=self.duration,
-            tnum=self.track_number,
+        return _search_recordings(
+            {"recording": self.track,
+             "artist": self.artist,
+             "release": self.album,
+             "dur": self.duration,
+             "tnum": self.track_number},
             strict=self.strict,
             limit=self.limit,
+            session=self.session,
         )
-        return search_results["recording-list"]
 
     @staticmethod
     def _filter_search_results(results: dict) -> list:
@@ -163,7 +447,7 @@ class MusicBrainzAlign:
         search_results_filtered : dict
             Dictionary containing the filtered search results.
         """
-        return [res for res in results if "isrc-list" in res.keys()]
+        return [res for res in results if res.get("isrcs")]
 
     def get_recording(self) -> dict | list | None:
         """
@@ -186,19 +470,47 @@ class MusicBrainzAlign:
     @property
     def get_best_match(self) -> dict | None:
         """
-        Searches for the track in the MusicBrainz database.
+        Searches for the track in the MusicBrainz database. The search is
+        performed on first access only, and the result is reused by all the
+        getters.
         Returns
         -------
         search_results : dict
             Dictionary containing the search results.
         """
-        results = self.get_recording()
-        if isinstance(results, list) and len(results) > 0:
-            return results[0]
-        elif isinstance(results, dict):
-            if "recording" in results.keys():
-                return results["recording"]
-        return None
+        if self._cached_best is _UNSET:
+            results = self.get_recording()
+            if isinstance(results, list):
+                results = results[0] if results else None
+            self._cached_best = results
+        return self._cached_best
+
+    def _with_releases(self) -> dict | None:
+        """
+        Returns the best match including its releases. Recordings looked up
+        by MBID are retrieved without releases at first, so the releases are
+        requested and merged into the best match only when needed.
+        Returns
+        -------
+        best_match : dict
+            Dictionary containing the best match.
+        """
+        best_match = self.get_best_match
+        if best_match is not None and "releases" not in best_match \
+                and self.mbid_track:
+            results = self._search_by_mbid(includes=RELEASE_INCLUDES)
+            # merged into a new dictionary, as the cached results are shared
+            best_match = {"releases": [], **best_match, **(results or {})}
+            self._cached_best = best_match
+        return best_match
+
+    def _first_release(self) -> dict:
+        """
+        Returns the first release of the best match, or an empty dictionary
+        if there is none.
+        """
+        best_match = self._with_releases() or {}
+        return (best_match.get("releases") or [{}])[0]
 
     def get_track(self) -> str | None:
         """
@@ -208,8 +520,8 @@ class MusicBrainzAlign:
         search_results : str
             Dictionary containing the search results.
         """
-        if self.best_match:
-            return self.best_match.get("title", None)
+        if self.get_best_match:
+            return self.get_best_match.get("title", None)
 
     def get_artist(self) -> str | None:
         """
@@ -219,8 +531,8 @@ class MusicBrainzAlign:
         search_results : str
             Dictionary containing the search results.
         """
-        if self.best_match:
-            return self.best_match.get("artist-credit-phrase", None)
+        if self.get_best_match:
+            return _artist_credit(self.get_best_match) or None
 
     def get_album(self) -> str | None:
         """
@@ -230,10 +542,7 @@ class MusicBrainzAlign:
         search_results : str
             Dictionary containing the search results.
         """
-        try:
-            return self.best_match["release-list"][0]["title"]  # type: ignore
-        except (TypeError, KeyError):
-            return None
+        return self._first_release().get("title")
 
     def get_duration(self) -> float | None:
         """
@@ -243,10 +552,8 @@ class MusicBrainzAlign:
         search_results : float
             Dictionary containing the search results.
         """
-        try:
-            return float(self.best_match["length"]) / 1000  # type: ignore
-        except (TypeError, KeyError):
-            return None
+        length = (self.get_best_match or {}).get("length")
+        return float(length) / 1000 if length is not None else None
 
     def get_mbid(self) -> str | None:
         """
@@ -256,8 +563,8 @@ class MusicBrainzAlign:
         search_results : str
             Dictionary containing the search results.
         """
-        if self.best_match:
-            return self.best_match.get("id", None)
+        if self.get_best_match:
+            return self.get_best_match.get("id", None)
         
     def get_iswc(self) -> list[str] | None:
         """
@@ -269,8 +576,8 @@ class MusicBrainzAlign:
         None
             If no ISWC code is found.
         """
-        if self.best_match:
-            return self.best_match.get("iswc-list", None)
+        if self.get_best_match:
+            return self.get_best_match.get("iswcs", None)
 
     def get_isrc(self) -> list[str] | None:
         """
@@ -282,8 +589,8 @@ class MusicBrainzAlign:
         None
             If no ISRC code is found.
         """
-        if self.best_match:
-            return self.best_match.get("isrc-list", None)
+        if self.get_best_match:
+            return self.get_best_match.get("isrcs", None)
 
     def get_release_date(self) -> str | None:
         """
@@ -293,10 +600,7 @@ class MusicBrainzAlign:
         irsc_list : str
             Dictionary containing the search results.
         """
-        try:
-            return self.best_match["release-list"][0]["date"]  # type: ignore
-        except (TypeError, KeyError):
-            return None
+        return self._first_release().get("date")
 
     def get_track_number(self) -> int | None:
         """
@@ -306,11 +610,8 @@ class MusicBrainzAlign:
         irsc_list : int
             Dictionary containing the search results.
         """
-        try:
-            return self.best_match["release-list"][0]["medium-list"][0][  # type: ignore
-                "track-list"][0]["number"]
-        except (TypeError, KeyError):
-            return None
+        medium = (self._first_release().get("media") or [{}])[0]
+        return (medium.get("track") or [{}])[0].get("number")
 
 
 if __name__ == "__main__":
@@ -3,16 +3,69 @@ Scripts for retrieving the ISRC code from a Spotify ID.
 """
 import os
 import sys
+from functools import lru_cache
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 
-import mml_secrets as constants
-
+import requests
 import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+from requests.adapters import HTTPAdapter
+from spotipy.exceptions import SpotifyException
+from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOauthError
+
+# maximum number of tracks retrieved by a single request
+BULK_SIZE = 50
+
+# ISRC codes already retrieved, either one by one or in bulk
+_isrcs: dict[str, str | None] = {}
+
+
+def _load_credentials() -> tuple[str, str]:
+    """
+    Returns the Spotify credentials, read from the SPOTIPY_CLIENT_ID and
+    SPOTIPY_CLIENT_SECRET environment variables if set, or from the
+    mml_secrets module otherwise.
+    Returns
+    -------
+    tuple[str, str]
+        Client ID and client secret.
+    """
+    client_id = os.environ.get("SPOTIPY_CLIENT_ID")
+    client_secret = os.environ.get("SPOTIPY_CLIENT_SECRET")
+    if client_id and client_secret:
+        return client_id, client_secret
+
+    import mml_secrets as constants
+
+    return constants.SPOTIFY_CLIENT_ID, constants.SPOTIFY_CLIENT_SECRET
+
 
-os.environ['SPOTIPY_CLIENT_ID'] = constants.SPOTIFY_CLIENT_ID
-os.environ['SPOTIPY_CLIENT_SECRET'] = constants.SPOTIFY_CLIENT_SECRET
+@lru_cache(maxsize=1)
+def _spotify() -> spotipy.Spotify:
+    """
+    Returns the Spotify client, built on first use only, so that importing
+    the module does not require the credentials. The client keeps its access
+    token, so the credentials are exchanged once per process.
+    Returns
+    -------
+    spotipy.Spotify
+        Spotify client.
+    """
+    client_id, client_secret = _load_credentials()
+
+    # pooled connections reused by the concurrent lookups
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=32))
+    return spotipy.Spotify(
+        client_credentials_manager=SpotifyClientCredentials(
+            client_id=client_id,
+            client_secret=client_secret,
+        ),
+        requests_session=session,
+        # back off on 429 responses, honouring Retry-After
+        status_retries=5,
+        backoff_factor=0.5,
+    )
 
 
 def get_isrc(spotify_id: str) -> str | None:
@@ -25,16 +78,41 @@ def get_isrc(spotify_id: str) -> str | None:
     Returns
     -------
     str
-        ISRC code.
+        ISRC code, or None if it is not found or could not be retrieved.
     """
-    client_credentials_manager = SpotifyClientCredentials()
+    return get_isrcs_bulk([spotify_id])[str(spotify_id)]
+
 
-    sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
-    track = sp.track(str(spotify_id))
-    try:
-        return track["external_ids"]["isrc"]  # type: ignore
-    except spotipy.exceptions.SpotifyException:
-        return None
+def get_isrcs_bulk(spotify_ids: list[str]) -> dict[str, str | None]:
+    """
+    Returns the ISRC codes of several Spotify IDs, with one request every
+    BULK_SIZE IDs. The codes are stored, so that the following calls to
+    get_isrc do not query Spotify again.
+    Parameters
+    ----------
+    spotify_ids : list[str]
+        Spotify IDs.
+    Returns
+    -------
+    dict[str, str | None]
+        ISRC code of each Spotify ID, or None if it is not found or could not
+        be retrieved.
+    """
+    missing = [spotify_id for spotify_id in dict.fromkeys(map(str, spotify_ids))
+               if spotify_id not in _isrcs]
+    for start in range(0, len(missing), BULK_SIZE):
+        chunk = missing[start:start + BULK_SIZE]
+        try:
+            tracks = _spotify().tracks(chunk)["tracks"]
+        except (SpotifyException, SpotifyOauthError,
+                requests.RequestException):
+            # not stored, so that the next call retries them
+            continue
+        for spotify_id, track in zip(chunk, tracks):
+            _isrcs[spotify_id] = (track or {}).get(
+                "external_ids", {}).get("isrc")
+    return {str(spotify_id): _isrcs.get(str(spotify_id))
+            for spotify_id in spotify_ids}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+"""
+Client-side rate limiting for the web services, so that concurrent lookups
+stay under the limits posted by each service instead of triggering 429/503
+responses and blind retries.
+"""
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket allowing at most max_rate requests every
+    time_period seconds, with bursts of up to max_rate requests.
+    """
+
+    def __init__(self, max_rate: int, time_period: float = 1.0) -> None:
+        """
+        Parameters
+        ----------
+        max_rate : int
+            Maximum number of requests per period.
+        time_period : float
+            Duration of the period in seconds.
+        """
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a request can be issued.
+        """
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.max_rate,
+                    self._tokens
+                    + (now - self._updated) * self.max_rate / self.time_period,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep(
+                    (1 - self._tokens) * self.time_period / self.max_rate)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    Transport adapter for requests sessions that waits for the rate limiter
+    before each request actually sent over the network, and retries with
+    exponential back-off on 429 and 5xx responses, honouring Retry-After.
+    Responses served by a requests-cache session never reach the adapter, so
+    they are not throttled.
+    """
+
+    def __init__(self, limiter: RateLimiter, max_retries: int = 5,
+                 pool_maxsize: int = 32, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        limiter : RateLimiter
+            Rate limiter shared by all the requests to the service.
+        max_retries : int
+            Maximum number of retries on 429 and 5xx responses.
+        pool_maxsize : int
+            Maximum number of connections kept alive per host, to be reused
+            by the concurrent lookups instead of opening new ones.
+        """
+        self.limiter = limiter
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET", "HEAD"),
+            respect_retry_after_header=True,
+        )
+        super().__init__(max_retries=retry, pool_maxsize=pool_maxsize,
+                         **kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        return super().send(request, **kwargs)
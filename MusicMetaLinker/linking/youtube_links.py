@@ -2,14 +2,52 @@
 Searches for musicbrainz id on ListerBrainz for retrieving the YouTube links.
 """
 
+import logging
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
 from ytmusicapi import YTMusic
 
+from .cache import cached
+
+logger = logging.getLogger(__name__)
+
+# number of results requested, as only the top ones are considered
+SEARCH_LIMIT = 5
+
+# fields of the search results read by the getters
+RESULT_FIELDS = ("videoId", "title", "artists", "album", "duration",
+                 "duration_seconds", "year")
+
+# marks a best match that has not been searched yet
+_UNSET = object()
+
+
+@lru_cache(maxsize=1)
+def _ytmusic() -> YTMusic:
+    """
+    Returns the YouTube Music client, built on first use only and shared by
+    all the instances, so that the HTTP session is reused.
+    Returns
+    -------
+    YTMusic
+        YouTube Music client.
+    """
+    # enough pooled connections for the concurrent lookups
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=32))
+    return YTMusic(requests_session=session)
+
 
 class YouTubeAlign:
     """
     Class for retrieving the YouTube links given the track metadata.
     """
 
+    __slots__ = ("track", "artist", "album", "track_number", "duration",
+                 "isrc", "strict", "yt", "_best_match")
+
     def __init__(
         self,
         track: str | None = None,
@@ -51,25 +89,36 @@ class YouTubeAlign:
         self.isrc = isrc
         self.strict = strict
 
-        print(f"Searching for {self.artist} - {self.track} on YouTube Music")
+        logger.debug("Searching for %s - %s on YouTube Music",
+                     self.artist, self.track)
 
-        self.yt = YTMusic()
+        self.yt = _ytmusic()
+        self._best_match = _UNSET
 
+    @cached("youtube.search", ("artist", "track", "album", "strict"))
     def _search(self) -> list:
         """
-        Searches for the track on YouTube Music.
+        Searches for the track on YouTube Music. The results are cached on
+        disk, so that the same search is not performed again on later runs.
         Returns
         -------
         list
             List of results.
         """
-        # search for the track
+        # missing fields are left out, instead of searching for "None"
+        query = " ".join(
+            field for field in (self.artist, self.track, self.album) if field
+        )
         results = self.yt.search(
-            f"{self.artist} {self.track} {self.album}",
+            query,
             filter="songs",
+            limit=SEARCH_LIMIT,
             ignore_spelling=self.strict,
         )
-        return results
+        # only keep the fields read by the getters, so that the cached
+        # results are small
+        return [{field: result.get(field) for field in RESULT_FIELDS}
+                for result in results]
 
     def _filter_duration(self, results: list, duration_threshold: int) -> list:
         """
@@ -96,7 +145,20 @@ class YouTubeAlign:
 
     def get_best_match(self) -> dict | None:
         """
-        Returns the best match for the track.
+        Returns the best match for the track. The search is performed on the
+        first call only, and its result is shared by all the getters.
+        Returns
+        -------
+        dict
+            Dictionary containing the best match.
+        """
+        if self._best_match is _UNSET:
+            self._best_match = self._find_best_match()
+        return self._best_match
+
+    def _find_best_match(self) -> dict | None:
+        """
+        Searches for the best match for the track.
         Returns
         -------
         dict
@@ -6,9 +6,10 @@ import logging
 import os
 import sys
 import tarfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from urllib import request, error
 
+import requests
 import tqdm
 
 logging.basicConfig(level=logging.INFO)
@@ -32,6 +33,7 @@ class MBDownload:
     url_server_1 = 'https://data.metabrainz.org/pub/musicbrainz/data/fullexport/'
     url_server_2 = 'https://ftp.osuosl.org/pub/musicbrainz/data/fullexport/'
     url_server_3 = 'https://mirrors.dotsrc.org/MusicBrainz/data/fullexport/'
+    chunk_size = 1 << 20
 
     def __init__(self, url: None | str,
                  output_dir: str | Path,
@@ -51,34 +53,54 @@ class MBDownload:
 
         Raises
         ------
-        urllib.error.HTTPError
-            If the specified URL is not valid.
+        requests.ConnectionError
+            If no server responds.
 
         Returns
         -------
         None
         """
+        # one session, so that the connection to the server is kept alive
+        self.session = requests.Session()
         # if no preferred server is specified, use the first one that responds
-        if url is None:
-            try:
-                request.urlopen(self.url_server_1)
-                self.url = self.url_server_1
-                logger.info('Using the first server.')
-            except request.HTTPError:
-                try:
-                    request.urlopen(self.url_server_2)
-                    self.url = self.url_server_2
-                    logger.info('Using the second server.')
-                except request.HTTPError:
-                    try:
-                        request.urlopen(self.url_server_3)
-                        self.url = self.url_server_3
-                        logger.info('Using the third server.')
-                    except request.HTTPError as e:
-                        raise error from e
+        self.url = url if url is not None else self._first_responding_server()
         self.output_dir = output_dir
         self.file_name = 'mbdump.tar.bz2'
 
+    def _first_responding_server(self) -> str:
+        """
+        Probes all the servers at once and returns the first one that
+        responds successfully.
+
+        Raises
+        ------
+        requests.ConnectionError
+            If no server responds.
+
+        Returns
+        -------
+        str
+            URL of the server.
+        """
+        servers = (self.url_server_1, self.url_server_2, self.url_server_3)
+        executor = ThreadPoolExecutor(max_workers=len(servers))
+        futures = {executor.submit(self.session.head, server, timeout=3,
+                                   allow_redirects=True): server
+                   for server in servers}
+        try:
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except requests.RequestException:
+                    continue
+                if response.ok:
+                    logger.info(f'Using the server {futures[future]}')
+                    return futures[future]
+        finally:
+            # do not wait for the slower servers
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise requests.ConnectionError('No MusicBrainz server responded.')
+
     def _get_latest_dump(self, file_name: str = 'mbdump.tar.bz2') -> str:
         """
         Gets the latest dump from the MusicBrainz database.
@@ -90,7 +112,7 @@ class MBDownload:
 
         Raises
         ------
-        urllib.error.HTTPError
+        requests.HTTPError
             If the specified URL is not valid.
 
         Returns
@@ -104,23 +126,28 @@ class MBDownload:
         try:
             logger.info('Getting the latest dump from MusicBrainz...')
             # get latest dump
-            latest_response = request.urlopen(self.url + 'LATEST')
-            latest_dump = latest_response.read().decode('utf-8').strip()
+            latest_response = self.session.get(self.url + 'LATEST',
+                                               timeout=30)
+            latest_response.raise_for_status()
+            latest_dump = latest_response.text.strip()
 
             return self.url + latest_dump + '/' + file_name
 
-        except Exception as e:
+        except requests.RequestException:
             logger.error('Getting the latest dump failed.')
-            raise error from e
+            raise
 
     def download(self):
         """
-        Downloads the dump from the MusicBrainz database.
+        Downloads the dump from the MusicBrainz database, extracting it while
+        it is downloaded, without storing the compressed archive on disk.
 
         Raises
         ------
-        urllib.error.HTTPError
+        requests.HTTPError
             If the specified URL is not valid.
+        tarfile.TarError
+            If the downloaded dump cannot be extracted.
 
         Returns
         -------
@@ -128,31 +155,27 @@ class MBDownload:
         """
         download_url = self._get_latest_dump()
 
-        compressed_file = self.output_dir + self.file_name
-
         try:
-            logger.info('Downloading the dump from MusicBrainz...')
-            # download the dump
+            logger.info('Downloading and extracting the dump from '
+                        'MusicBrainz...')
             if not os.path.exists(self.output_dir):
                 os.makedirs(self.output_dir)
-            with DownloadProgressBar(unit='B',
-                                     unit_scale=True,
-                                     miniters=1,
-                                     desc='Downloading MusicBrainz') as dpb:
-                request.urlretrieve(download_url,
-                                    compressed_file,
-                                    reporthook=dpb.update_to)
-            logger.info('Download finished.')
-
-            # extract the dump
-            logger.info('Extracting the dump...')
-            tar = tarfile.open(compressed_file, 'r:bz2')
-            tar.extractall(self.output_dir)
-            tar.close()
+            with self.session.get(download_url, stream=True,
+                                  timeout=30) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                total = int(response.headers.get('content-length', 0)) or None
+                # decompress and extract the archive as it is received
+                with DownloadProgressBar.wrapattr(
+                        response.raw, 'read', total=total,
+                        desc='Downloading MusicBrainz') as stream, \
+                        tarfile.open(fileobj=stream, mode='r|bz2',
+                                     bufsize=self.chunk_size) as tar:
+                    tar.extractall(self.output_dir)
             logger.info('Extraction finished.')
-        except Exception as e:
+        except (requests.RequestException, tarfile.TarError):
             logger.error('Download failed.')
-            raise error from e
+            raise
 
 
 if __name__ == '__main__':
@@ -169,5 +192,5 @@ if __name__ == '__main__':
     try:
         mb_download = MBDownload(args.url, args.output_dir, args.clean)
         mb_download.download()
-    except error as e:
+    except (requests.RequestException, tarfile.TarError):
         print('Download failed.', file=sys.stderr)
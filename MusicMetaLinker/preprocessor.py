@@ -3,10 +3,13 @@ will be used for aligning the data with the MusicBrainz database.
 """
 
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import namespaces
 import jams
+import orjson
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,6 +22,30 @@ class JAMSProcessor:
     writing them in a new JAMS file.
     """
 
+    __slots__ = (
+        "jams_file",
+        "annotations",
+        "metadata",
+        "sandbox",
+        "track_name",
+        "artist_name",
+        "album_name",
+        "duration",
+        "identifiers",
+        "jams_version",
+        "_ids",
+        "musicbrainz_id",
+        "isrc",
+        "deezer_id",
+        "type",
+        "genre",
+        "track_number",
+        "release_year",
+        "composers",
+        "performers",
+        "tuning",
+    )
+
     def __init__(self, jams_file: Path) -> None:
         """
         Initializes the class by taking the path to the JAMS file and the output
@@ -32,28 +59,31 @@ class JAMSProcessor:
         None
         """
         self.jams_file = jams_file
-        # Load the JAMS file
-        self.jams = jams.JAMS.loads(jams_file.read_text())
-        # Create a new JAMS file
-        self.jams_new = jams.JAMS()
+        # Load the JAMS file as plain JSON, without building jams objects
+        jams_dict = orjson.loads(jams_file.read_bytes())
+        # only the first annotation is written to the new JAMS file, so the
+        # others are not kept, nor sent back by the parsing processes
+        self.annotations = jams_dict.get('annotations', [])[:1]
 
         # get the metadata
-        self.metadata = self.jams.file_metadata
+        self.metadata = jams_dict.get('file_metadata') or {}
         # get the sandbox
-        self.sandbox = self.jams.sandbox
+        self.sandbox = jams_dict.get('sandbox') or {}
 
         # get individual metadata
-        self.track_name = self.metadata.title
-        self.artist_name = self.metadata.artist
+        self.track_name = self.metadata.get('title', '')
+        self.artist_name = self.metadata.get('artist', '')
         if isinstance(self.artist_name, list):
             self.artist_name = self.artist_name[0]
-        self.album_name = self.metadata.release
-        self.duration = self.metadata.duration
-        self.identifiers = self.metadata.identifiers
-        self.jams_version = self.metadata.jams_version
-        self.musicbrainz_id = None
-        if 'musicbrainz' in self.metadata.identifiers.keys():
-            self.musicbrainz_id = self.metadata.identifiers['musicbrainz']
+        self.album_name = self.metadata.get('release', '')
+        self.duration = self.metadata.get('duration')
+        self.identifiers = self.metadata.get('identifiers') or {}
+        self.jams_version = self.metadata.get('jams_version')
+        # normalized identifiers, frozen at construction
+        self._ids = dict(self.identifiers or ())
+        self.musicbrainz_id = self._ids.get('musicbrainz')
+        self.isrc = self._ids.get('isrc')
+        self.deezer_id = self._ids.get('deezer_id')
 
         # get individual sandbox
         try:
@@ -62,58 +92,121 @@ class JAMSProcessor:
             self.type = 'score'
         self.genre = self.sandbox['genre']
         try:
-            self.track_number = self.sandbox.track_number  # type: ignore
-            self.release_year = self.sandbox.release_year  # type: ignore
-            self.composers = self.sandbox.composers  # type: ignore
-            self.performers = self.sandbox.performers  # type: ignore
-        except AttributeError:
+            self.track_number = self.sandbox['track_number']
+            self.release_year = self.sandbox['release_year']
+            self.composers = self.sandbox['composers']
+            self.performers = self.sandbox['performers']
+        except KeyError:
             self.track_number = None
             self.release_year = None
             self.composers = None
             self.performers = None
         self.tuning = None
         if 'tuning' in self.sandbox.keys():
-            self.tuning = self.sandbox.tuning  # type: ignore
-        if not self.artist_name and (self.composers or self.performers):
-            if self.type == 'score':
-                self.artist_name = 'and'.join(self.composers)  # type: ignore
-            elif self.type == 'audio':
-                self.artist_name = 'and'.join(self.performers)  # type: ignore
-
-    def write_jams(self, output_path: Path) -> None:
+            self.tuning = self.sandbox['tuning']
+        # the names are only joined if the artist is missing
+        if not self.artist_name:
+            if self.type == 'score' and self.composers:
+                self.artist_name = ' and '.join(self.composers)
+            elif self.type == 'audio' and self.performers:
+                self.artist_name = ' and '.join(self.performers)
+
+    def write_jams(self, output_path: Path, validate: bool = False) -> None:
         """
-        Writes the extracted information in a new JAMS file.
+        Writes the extracted information in a new JAMS file, together with
+        the first annotation of the original one. The file is serialized
+        directly with orjson, without building and validating jams objects.
+        Parameters
+        ----------
+        output_path : Path
+            Path to the directory where the new JAMS file is written.
+        validate : bool
+            Whether to validate the new JAMS file against the JAMS schema,
+            logging the problems found, e.g. for debugging.
+        Returns
+        -------
+        None
         """
         if not output_path.exists():
             output_path.mkdir(parents=True)
-        new_metadata = jams.FileMetadata(
-            title=self.track_name,
-            artist=self.artist_name,
-            release=self.album_name,
-            duration=self.duration,
-            identifiers=self.identifiers,
-            jams_version=self.jams_version,
-        )
+        new_metadata = {
+            'title': self.track_name,
+            'artist': self.artist_name,
+            'release': self.album_name,
+            'duration': self.duration,
+            'identifiers': dict(self.identifiers or {}),
+            'jams_version': self.jams_version or jams.__version__,
+            'curator': {'name': '', 'email': ''},
+            'corpus': '',
+        }
 
-        new_sandbox = jams.Sandbox(
-            type=self.type,
-            genre=self.genre,
-            track_number=self.track_number,
-            release_year=self.release_year,
-            composers=self.composers,
-            performers=self.performers,
-            tuning=self.tuning,
-        )
+        new_sandbox = {
+            'type': self.type,
+            'genre': self.genre,
+            'track_number': self.track_number,
+            'release_year': self.release_year,
+            'composers': self.composers,
+            'performers': self.performers,
+            'tuning': self.tuning,
+        }
 
-        # add the metadata
-        self.jams_new.file_metadata = new_metadata
-        # add the sandbox
-        self.jams_new.sandbox = new_sandbox
-        # add the annotations
-        self.jams_new.annotations.append(self.jams.annotations[0])
+        # the annotation is passed through as it is in the original file
+        new_jams = orjson.dumps(
+            {
+                'annotations': self.annotations,
+                'file_metadata': new_metadata,
+                'sandbox': new_sandbox,
+            },
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+        )
+        if validate:
+            jams.JAMS.loads(new_jams.decode()).validate(strict=False)
         # write the JAMS file
-        self.jams_new.save(str(output_path / self.jams_file.name),
-                           strict=False)
+        (output_path / self.jams_file.name).write_bytes(new_jams)
+
+    @classmethod
+    def process_directory(cls,
+                          directory: Path,
+                          output_path: Path,
+                          n_process: int | None = None,
+                          chunksize: int = 32) -> None:
+        """
+        Extracts the information of all the JAMS files of a directory and
+        writes them in new JAMS files, parsing and writing the files in
+        parallel processes.
+        Parameters
+        ----------
+        directory : Path
+            Path to the directory containing the JAMS files.
+        output_path : Path
+            Path to the directory where the new JAMS files are written.
+        n_process : int | None
+            Number of processes, by default all the cores but one.
+        chunksize : int
+            Number of files sent to a process at once.
+        Returns
+        -------
+        None
+        """
+        if n_process is None:
+            n_process = max(1, (os.cpu_count() or 1) - 1)
+        # created beforehand, so that the processes do not race to do it
+        output_path.mkdir(parents=True, exist_ok=True)
+        jams_files = sorted(directory.glob('*.jams'))
+        with ProcessPoolExecutor(max_workers=n_process) as executor:
+            for _ in executor.map(_process_one, jams_files,
+                                  [output_path] * len(jams_files),
+                                  chunksize=chunksize):
+                pass
+
+
+def _process_one(jams_file: Path, output_path: Path) -> None:
+    """
+    Extracts the information of a JAMS file and writes it in a new JAMS
+    file, in a worker process.
+    """
+    JAMSProcessor(jams_file).write_jams(output_path)
 
 
 if __name__ == '__main__':
@@ -1,12 +1,43 @@
 """
 Utility functions for the elka package.
 """
+import logging
+import os
+import re
 from pathlib import Path
 
+import orjson
 import pandas as pd
 
 from partitions_map import AUDIO_PARTITIONS
 
+logger = logging.getLogger(__name__)
+
+# constant-time membership checks for the partition names
+_AUDIO = frozenset(AUDIO_PARTITIONS)
+# extension left in the names of the audio files converted from JAMS
+_JAMS_RE = re.compile(r"\.jams")
+
+
+def _write_csv(data: pd.DataFrame, output_file: Path) -> None:
+    """
+    Writes a dataframe to a CSV file with the pyarrow writer, which formats
+    the columns in C++ instead of row by row. Falls back to pandas if pyarrow
+    is not installed or cannot convert the columns, e.g. mixed types.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        data.to_csv(output_file, index=False)
+        return
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        data.to_csv(output_file, index=False)
+        return
+    pa_csv.write_csv(table, str(output_file))
+
 
 def log_downloaded_data(data: pd.DataFrame,
                         output_file: Path,
@@ -30,9 +61,15 @@ def log_downloaded_data(data: pd.DataFrame,
     None
     """
     if output_format == "csv":
-        data.to_csv(output_file, index=False)
+        _write_csv(data, output_file)
     elif output_format == "json":
-        data.to_json(output_file, orient="records", indent=4)
+        # orjson only supports two-space indentation
+        records = data.to_dict(orient="records")
+        output_file.write_bytes(orjson.dumps(
+            records,
+            default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY,
+        ))
     else:
         raise ValueError("Unsupported output format.")
 
@@ -49,7 +86,7 @@ def reformat_filenames(partitions_path: Path) -> None:
     None
     """
     for partition in partitions_path.iterdir():
-        if partition.name not in AUDIO_PARTITIONS:
+        if partition.name not in _AUDIO:
             continue
         print(f"Processing partition {partition.name}")
         # partition/choco/jams_converted if exists else partition/choco/jams
@@ -57,13 +94,43 @@ def reformat_filenames(partitions_path: Path) -> None:
 
         if partition.name == "schubert-winterreise":
             jams_path = partition / "choco" / "audio" / "audio"
-        # iterate over the JAMS files
-        for audio_file in jams_path.glob("*.mp3"):
-            print(f"Processing JAMS file {audio_file}")
-            if ".jams" in audio_file.name:
-                new_name = audio_file.name.replace(".jams", "")
-                audio_file.rename(audio_file.parent / new_name)
-                print(f"Renamed {audio_file} to {new_name}")
+        # iterate over the audio files, the directory entries are read
+        # without an extra stat per file
+        with os.scandir(jams_path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".mp3"):
+                    continue
+                new_name = _JAMS_RE.sub("", entry.name)
+                if new_name == entry.name:
+                    continue
+                os.rename(entry.path, os.path.join(jams_path, new_name))
+                logger.debug("Renamed %s to %s", entry.path, new_name)
+
+
+def _rewrite_audio_csv(audio_files_csv: Path) -> None:
+    """
+    Replaces the .jams extension of the audio files with .mp3 in an audio
+    files CSV, sorted by JAMS file. The columns are read, transformed and
+    written by pyarrow kernels when it is installed, and by pandas otherwise.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        df = pd.read_csv(audio_files_csv)
+        df["audio_file"] = (df["audio_file"].astype(str).
+                            str.replace(".jams", ".mp3", regex=False))
+        df = df.sort_values(by=["jams_file"])
+        df.to_csv(audio_files_csv, index=False)
+        return
+
+    table = pa_csv.read_csv(audio_files_csv)
+    audio_files = pc.replace_substring(
+        table["audio_file"].cast(pa.string()), ".jams", ".mp3")
+    table = table.set_column(table.schema.get_field_index("audio_file"),
+                             "audio_file", audio_files)
+    pa_csv.write_csv(table.sort_by("jams_file"), str(audio_files_csv))
 
 
 def reformat_audio_csv(partitions_path: Path) -> None:
@@ -79,7 +146,7 @@ def reformat_audio_csv(partitions_path: Path) -> None:
     None
     """
     for partition in partitions_path.iterdir():
-        if partition.name not in AUDIO_PARTITIONS:
+        if partition.name not in _AUDIO:
             continue
         print(f"Processing partition {partition.name}")
 
@@ -87,12 +154,7 @@ def reformat_audio_csv(partitions_path: Path) -> None:
         if partition.name == "schubert-winterreise":
             audio_files_csv = partition / "choco" / "audio" / "audio_files.csv"
 
-        df = pd.read_csv(audio_files_csv)
-        df["audio_file"] = (df["audio_file"].
-                            apply(lambda x: str(x).
-                                  replace(".jams", ".mp3")))
-        df = df.sort_values(by=["jams_file"])
-        df.to_csv(audio_files_csv, index=False)
+        _rewrite_audio_csv(audio_files_csv)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import diskcache
+import pytest
+
+# the modules import each other as top-level packages
+sys.path.insert(0, str(Path(__file__).parents[1] / "MusicMetaLinker"))
+
+from linking import cache  # noqa: E402
+
+
+@pytest.fixture
+def lookups(tmp_path, monkeypatch):
+    """
+    Empty search cache, enabled and not retrying the misses.
+    """
+    store = diskcache.Cache(str(tmp_path / "lookups"))
+    monkeypatch.setattr(cache, "_lookups", store)
+    monkeypatch.setattr(cache, "_enabled", True)
+    monkeypatch.setattr(cache, "_retry_misses", False)
+    cache._memory.clear()
+    yield store
+    cache._memory.clear()
+    store.close()
@@ -0,0 +1,166 @@
+import pytest
+import requests
+
+from linking import musicbrainz_links
+from linking.musicbrainz_links import MusicBrainzAlign
+
+CATALOGUE = [
+    {"id": "mbid-1", "title": "First", "isrcs": ["ISRC1"], "length": 180000,
+     "artist-credit": [{"name": "Artist"}],
+     "releases": [
+         {"title": "Album", "status": "Official",
+          "release-group": {"primary-type": "Album"}},
+         {"title": "Best Of", "status": "Official",
+          "release-group": {"primary-type": "Album",
+                            "secondary-types": ["Compilation"]}},
+         {"title": "Live", "status": "Bootleg",
+          "release-group": {"primary-type": "Album"}},
+         {"title": "Tribute", "status": "Official",
+          "release-group": {"primary-type": "Other"}},
+     ]},
+    {"id": "mbid-2", "title": "Second", "isrcs": ["ISRC2", "ISRC3"],
+     "artist-credit": [{"name": "Artist", "joinphrase": " & "},
+                       {"name": "Guest"}]},
+    {"id": "mbid-3", "title": "Third", "isrcs": [],
+     "artist-credit": [{"name": "Artist"}]},
+    {"id": "mbid-4", "title": "Third (Live)", "isrcs": ["ISRC4"],
+     "artist-credit": [{"name": "Artist"}]},
+]
+
+
+def _matches(recording, clause):
+    if clause.startswith("rid:"):
+        return recording["id"] == clause[4:]
+    if clause.startswith("isrc:"):
+        return clause[5:] in recording["isrcs"]
+    # the search engine matches names loosely
+    return recording["title"].split()[0].lower() in clause.lower()
+
+
+def _ids(recordings):
+    return {idx: recording["id"] for idx, recording in recordings.items()}
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """
+    Searches performed by batch_lookup, answered from CATALOGUE.
+    """
+    performed = []
+
+    def batch_search(clauses):
+        performed.append(clauses)
+        return [recording for recording in CATALOGUE
+                if any(_matches(recording, clause) for clause in clauses)]
+
+    monkeypatch.setattr(MusicBrainzAlign, "_batch_search",
+                        staticmethod(batch_search))
+    return performed
+
+
+def test_lookup_by_mbid(searches):
+    recordings = MusicBrainzAlign.batch_lookup([
+        {"mbid_track": "mbid-2", "isrc": "ISRC1"},
+        {"mbid_track": "missing"},
+        {"mbid_track": "mbid-1", "track": "Second", "artist": "Artist"},
+    ])
+
+    assert _ids(recordings) == {0: "mbid-2", 2: "mbid-1"}
+    assert searches[0] == ["rid:mbid-2", "rid:missing", "rid:mbid-1"]
+
+
+def test_lookup_by_isrc(searches):
+    recordings = MusicBrainzAlign.batch_lookup([
+        {"isrc": "ISRC3"},
+        {"isrc": ["MISSING", "ISRC1"]},
+        {"isrc": "ISRC2"},
+        {"isrc": "MISSING"},
+    ])
+
+    assert _ids(recordings) == {0: "mbid-2", 1: "mbid-1",
+                                2: "mbid-2"}
+
+
+def test_lookup_by_name(searches):
+    recordings = MusicBrainzAlign.batch_lookup([
+        {"track": "first", "artist": " artist"},
+        {"track": "Second", "artist": "Artist & Guest"},
+        # a different artist credit
+        {"track": "Second", "artist": "Artist"},
+        # a recording without ISRC, the live one has a different title
+        {"track": "Third", "artist": "Artist"},
+        {"track": "First", "artist": "Artist"},
+        # not enough parameters
+        {"track": "First"},
+    ])
+
+    assert _ids(recordings) == {0: "mbid-1", 1: "mbid-2",
+                                4: "mbid-1"}
+
+
+def test_lookup_by_name_checks_duration_and_album(searches):
+    recordings = MusicBrainzAlign.batch_lookup([
+        {"track": "First", "artist": "Artist", "duration": 182.0},
+        {"track": "First", "artist": "Artist", "duration": 240.0},
+        {"track": "First", "artist": "Artist", "album": "best of"},
+        {"track": "First", "artist": "Artist", "album": "Other"},
+        {"track": "Second", "artist": "Artist & Guest", "album": "Album"},
+    ])
+
+    assert _ids(recordings) == {0: "mbid-1", 2: "mbid-1"}
+
+
+def test_lookup_filters_releases(searches):
+    recording = MusicBrainzAlign.batch_lookup([{"mbid_track": "mbid-1"}])[0]
+
+    assert [release["title"] for release in recording["releases"]] == \
+        ["Album", "Best Of"]
+    # the cached search results are left unchanged
+    assert len(CATALOGUE[0]["releases"]) == 4
+
+
+def test_lookup_ignores_releases(searches):
+    # the recording is looked up among the tracks of the release
+    recordings = MusicBrainzAlign.batch_lookup([
+        {"mbid_release": "release", "track": "First", "artist": "Artist"},
+        {"mbid_release": "release", "isrc": "ISRC1"},
+    ])
+
+    assert _ids(recordings) == {}
+    assert searches == [[], [], []]
+
+
+def test_lookup_by_isrc_before_name(searches):
+    # e.g. the ISRC of a Billboard track, found on Spotify
+    recordings = MusicBrainzAlign.batch_lookup([
+        {"isrc": "ISRC2", "track": "First", "artist": "Artist"},
+    ])
+
+    assert _ids(recordings) == {0: "mbid-2"}
+    assert searches[2] == []
+
+
+def test_lookup_without_items(searches):
+    assert MusicBrainzAlign.batch_lookup([]) == {}
+    assert searches == [[], [], []]
+
+
+def test_batch_search_chunks_clauses(monkeypatch):
+    queries = []
+
+    def search_recordings(fields, query="", limit=None):
+        queries.append(query)
+        if len(queries) == 2:
+            raise requests.ConnectionError
+        return [{"id": query}]
+
+    monkeypatch.setattr(musicbrainz_links, "BATCH_SIZE", 2)
+    monkeypatch.setattr(musicbrainz_links, "_search_recordings",
+                        search_recordings)
+
+    recordings = MusicBrainzAlign._batch_search(
+        ["rid:a", "rid:b", "rid:c", "rid:d", "rid:e"])
+
+    assert queries == ["rid:a OR rid:b", "rid:c OR rid:d", "rid:e"]
+    # the failed chunk is skipped
+    assert recordings == [{"id": "rid:a OR rid:b"}, {"id": "rid:e"}]
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+from clean_partitions import clean_billboard as cb
+
+DUMP = pd.DataFrame({
+    "Song": ["Hound Dog", "Tutti Frutti"],
+    "Performer": ["Elvis Presley", "Little Richard"],
+    "spotify_track_id": ["id-hound", None],
+})
+
+
+@pytest.fixture
+def dump_paths(tmp_path, monkeypatch):
+    """
+    Paths of a full database dump and of its parquet copy.
+    """
+    excel_path = tmp_path / "billboard.xlsx"
+    excel_path.write_bytes(b"")
+    parquet_path = tmp_path / "billboard.parquet"
+    monkeypatch.setattr(cb, "BILLBOARD_PATH", str(excel_path))
+    monkeypatch.setattr(cb, "PARQUET_PATH", str(parquet_path))
+    cb._read_billboard_db.cache_clear()
+    yield excel_path, parquet_path
+    cb._read_billboard_db.cache_clear()
+
+
+def test_excel_is_converted_once(dump_paths, monkeypatch):
+    _, parquet_path = dump_paths
+    monkeypatch.setattr(pd, "read_excel", lambda path, usecols: DUMP)
+
+    pd.testing.assert_frame_equal(cb._read_billboard_db(), DUMP)
+    assert parquet_path.is_file()
+
+    def read_excel(path, usecols):
+        raise AssertionError("the parquet copy should be read")
+
+    monkeypatch.setattr(pd, "read_excel", read_excel)
+    cb._read_billboard_db.cache_clear()
+    pd.testing.assert_frame_equal(cb._read_billboard_db(), DUMP)
+
+
+def test_mixed_types_are_not_converted(dump_paths, monkeypatch):
+    _, parquet_path = dump_paths
+    # e.g. a song titled with a number
+    mixed = DUMP.assign(Song=[1999, "Tutti Frutti"])
+    monkeypatch.setattr(pd, "read_excel", lambda path, usecols: mixed)
+
+    pd.testing.assert_frame_equal(cb._read_billboard_db(), mixed)
+    assert not parquet_path.exists()
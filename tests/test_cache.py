@@ -0,0 +1,118 @@
+import pytest
+
+from linking import cache
+
+
+class Searcher:
+    """
+    Counts the searches actually performed, returning the given results.
+    """
+    def __init__(self, track, results):
+        self.track = track
+        self.results = results
+        self.calls = 0
+
+    @cache.cached("tests.search", ("track",))
+    def search(self, limit=1):
+        self.calls += 1
+        result = self.results[self.calls - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def _forget():
+    # a new run starts with an empty memory
+    cache._memory.clear()
+
+
+def test_cached_hit_skips_search(lookups):
+    first = Searcher("a", [["hit"]])
+    assert first.search() == ["hit"]
+    _forget()
+    second = Searcher("a", [["other"]])
+    assert second.search() == ["hit"]
+    assert second.calls == 0
+
+
+def test_cached_key_depends_on_fields_and_arguments(lookups):
+    searcher = Searcher("a", [["1"], ["2"], ["3"]])
+    assert searcher.search() == ["1"]
+    assert searcher.search(limit=2) == ["2"]
+    searcher.track = "b"
+    assert searcher.search() == ["3"]
+    assert searcher.calls == 3
+
+
+def test_cached_miss_is_kept(lookups):
+    Searcher("a", [[]]).search()
+    _forget()
+    searcher = Searcher("a", [["found"]])
+    assert searcher.search() == []
+    assert searcher.calls == 0
+
+
+def test_cached_miss_is_retried(lookups, monkeypatch):
+    Searcher("a", [[]]).search()
+    _forget()
+    monkeypatch.setattr(cache, "_retry_misses", True)
+    searcher = Searcher("a", [["found"]])
+    assert searcher.search() == ["found"]
+    assert searcher.calls == 1
+    # the result found on retry replaces the miss
+    _forget()
+    monkeypatch.setattr(cache, "_retry_misses", False)
+    assert Searcher("a", [[]]).search() == ["found"]
+
+
+def test_cached_hit_is_not_retried(lookups, monkeypatch):
+    Searcher("a", [["hit"]]).search()
+    _forget()
+    monkeypatch.setattr(cache, "_retry_misses", True)
+    searcher = Searcher("a", [["other"]])
+    assert searcher.search() == ["hit"]
+    assert searcher.calls == 0
+
+
+def test_cached_miss_expires_earlier(lookups, monkeypatch):
+    assert cache.MISS_EXPIRE_AFTER < cache.EXPIRE_AFTER
+    expires = []
+    monkeypatch.setattr(lookups, "set", lambda key, value, expire: (
+        expires.append(expire)))
+    Searcher("a", [[]]).search()
+    Searcher("b", [["hit"]]).search()
+    assert expires == [cache.MISS_EXPIRE_AFTER, cache.EXPIRE_AFTER]
+
+
+def test_cached_exceptions_are_not_cached(lookups):
+    searcher = Searcher("a", [ConnectionError(), ["hit"]])
+    with pytest.raises(ConnectionError):
+        searcher.search()
+    assert searcher.search() == ["hit"]
+    assert searcher.calls == 2
+
+
+def test_cached_disabled(lookups, monkeypatch):
+    monkeypatch.setattr(cache, "_enabled", False)
+    searcher = Searcher("a", [["1"], ["2"]])
+    assert searcher.search() == ["1"]
+    assert searcher.search() == ["2"]
+    assert len(lookups) == 0
+
+
+def test_load_store(lookups):
+    assert cache.load("tests.rows", ["a"]) is None
+    cache.store("tests.rows", ["a"], {"link": "x"})
+    assert cache.load("tests.rows", ["a"]) == {"link": "x"}
+    assert cache.load("tests.rows", ["b"]) is None
+
+
+def test_load_retries_misses(lookups, monkeypatch):
+    cache.store("tests.rows", ["a"], {"link": None}, miss=True)
+    cache.store("tests.rows", ["b"], {"link": "x"})
+    is_miss = lambda row: row["link"] is None  # noqa: E731
+    assert cache.load("tests.rows", ["a"], is_miss=is_miss) == \
+        {"link": None}
+    monkeypatch.setattr(cache, "_retry_misses", True)
+    assert cache.load("tests.rows", ["a"], is_miss=is_miss) is None
+    assert cache.load("tests.rows", ["b"], is_miss=is_miss) == {"link": "x"}
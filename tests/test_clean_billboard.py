@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from clean_partitions import clean_billboard as cb
+from linking import spotify_links
+
+DUMP = pd.DataFrame({
+    "Song": ["You Can't Judge A Book By The Cover", "Hound Dog",
+             "Hound Dog", "Tutti Frutti", "Someone", "One"],
+    "Performer": ["Bo Diddley", "Elvis Presley", "Big Mama Thornton",
+                  "Little Richard", "U2", "Metallica"],
+    "spotify_track_id": ["id-book", "id-hound", "id-thornton", None,
+                         "id-someone", "id-metallica"],
+})
+
+
+@pytest.fixture(autouse=True)
+def billboard_db(monkeypatch):
+    """
+    Replaces the full database dump with DUMP.
+    """
+    monkeypatch.setattr(cb, "_read_billboard_db", lambda: DUMP)
+    cb._build_billboard_index.cache_clear()
+    cb._build_fuzzy_choices.cache_clear()
+    yield
+    cb._build_billboard_index.cache_clear()
+    cb._build_fuzzy_choices.cache_clear()
+
+
+def test_exact_match():
+    assert cb.find_spotify_id("Hound Dog", "Elvis Presley") == "id-hound"
+    assert cb.find_spotify_id("Hound Dog", "Big Mama Thornton") == \
+        "id-thornton"
+
+
+def test_swapped_match():
+    assert cb.find_spotify_id("Elvis Presley", "Hound Dog") == "id-hound"
+
+
+def test_fuzzy_match():
+    assert cb.find_spotify_id("You can't judge a book by the cover",
+                              "Bo Diddley") == "id-book"
+    assert cb.find_spotify_id("Hound Dog!", "Presley, Elvis") == "id-hound"
+
+
+def test_fuzzy_match_below_threshold():
+    assert cb.find_spotify_id("Blue Suede Shoes", "Carl Perkins") is None
+
+
+def test_fuzzy_match_short_title():
+    # a title contained in another one, or the same title by another
+    # performer
+    assert cb.find_spotify_id("One", "U2") is None
+
+
+def test_missing_spotify_id():
+    assert cb.find_spotify_id("Tutti Frutti", "Little Richard") is None
+
+
+def test_clean_billboard(monkeypatch):
+    monkeypatch.setattr(spotify_links, "get_isrc",
+                        lambda spotify_id: f"isrc-{spotify_id}")
+
+    assert cb.clean_billboard("Hound Dog", "Elvis Presley") == \
+        ("id-hound", "isrc-id-hound")
+    assert cb.clean_billboard("Tutti Frutti", "Little Richard") == \
+        (None, None)
+
+
+def test_clean_billboard_without_isrc(monkeypatch):
+    def get_isrc(spotify_id):
+        raise ConnectionError
+
+    monkeypatch.setattr(spotify_links, "get_isrc", get_isrc)
+
+    assert cb.clean_billboard("Hound Dog", "Elvis Presley") == \
+        ("id-hound", None)
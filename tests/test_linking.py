@@ -0,0 +1,21 @@
+from linking import youtube_links
+from linking.linking import Align
+
+
+def test_no_deezer_search_without_terms():
+    aligner = Align(artist='', album='', track='')
+
+    assert aligner.dz_link is None
+    assert aligner.get_deezer_id() is None
+    assert aligner.get_deezer_link() is None
+    assert aligner.get_bpm() is None
+
+
+def test_deezer_and_youtube_are_not_strict(monkeypatch):
+    # the YouTube Music client queries the service when built
+    monkeypatch.setattr(youtube_links, "_ytmusic", lambda: None)
+    aligner = Align(artist='Artist', track='Track', strict=True)
+
+    assert aligner.mb_link.strict is True
+    assert aligner.dz_link.strict is False
+    assert aligner.yt_link.strict is False
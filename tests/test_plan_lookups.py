@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from link_partitions import plan_lookups
+
+
+def _jams(track, artist, mbid=None, album="Album", number=1,
+          duration=180.0):
+    return SimpleNamespace(track_name=track, artist_name=artist,
+                           musicbrainz_id=mbid, album_name=album,
+                           track_number=number, duration=duration)
+
+
+def test_same_parameters_are_grouped():
+    first, second = _jams("Song", "Artist"), _jams("Song", "Artist")
+    other = _jams("Other", "Artist")
+
+    plan = plan_lookups([first, second, other], "partition", "audio")
+
+    assert list(plan.values()) == [[first, second], [other]]
+
+
+def test_any_parameter_splits_groups():
+    jams = [_jams("Song", "Artist"),
+            _jams("Song", "Artist", mbid="id"),
+            _jams("Song", "Artist", album="Other"),
+            _jams("Song", "Artist", number=2),
+            _jams("Song", "Artist", duration=200.0)]
+
+    assert len(plan_lookups(jams, "partition", "audio")) == len(jams)
+
+
+def test_duration_is_ignored_for_scores():
+    first = _jams("Song", "Artist", duration=180.0)
+    second = _jams("Song", "Artist", duration=200.0)
+
+    plan = plan_lookups([first, second], "partition", "score")
+
+    assert list(plan.values()) == [[first, second]]
+
+
+def test_billboard_is_not_grouped_with_other_partitions():
+    key = next(iter(plan_lookups([_jams("Song", "Artist")],
+                                 "billboard", "audio")))
+    other = next(iter(plan_lookups([_jams("Song", "Artist")],
+                                   "partition", "audio")))
+
+    assert key != other
+
+
+def test_partition_peculiarities_are_applied():
+    # the same track, written differently in the partition
+    first = _jams("Song - Artist", None)
+    second = _jams(" Song [Artist]", None)
+
+    plan = plan_lookups([first, second], "biab-internet-corpus", "audio")
+
+    assert list(plan.values()) == [[first, second]]
@@ -0,0 +1,63 @@
+import os
+
+import pandas as pd
+
+from link_partitions import load_done, select_jams_files
+
+
+def _touch(path, mtime):
+    path.write_text("{}")
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_load_done_reads_sidecar(tmp_path):
+    linking_path = tmp_path / "linking.csv"
+    done_path = linking_path.with_suffix(".done")
+    done_path.write_text("a.jams\nb.jams\n")
+    os.utime(done_path, (1000, 1000))
+    # the sidecar takes precedence over the dataframe
+    pd.DataFrame({"jams_file": ["c.jams"]}).to_csv(linking_path)
+
+    assert load_done(linking_path) == ({"a.jams", "b.jams"}, 1000)
+
+
+def test_load_done_falls_back_to_dataframe(tmp_path):
+    linking_path = tmp_path / "linking.csv"
+    pd.DataFrame({"jams_file": ["a.jams", "c.jams"],
+                  "track_name": ["x", "y"]}).to_csv(linking_path)
+    os.utime(linking_path, (2000, 2000))
+
+    assert load_done(linking_path) == ({"a.jams", "c.jams"}, 2000)
+
+
+def test_load_done_without_previous_run(tmp_path):
+    assert load_done(tmp_path / "linking.csv") == (set(), 0.0)
+
+
+def test_select_skips_files_linked_before_previous_run(tmp_path):
+    _touch(tmp_path / "done.jams", 100)
+    modified = _touch(tmp_path / "modified.jams", 300)
+    new = _touch(tmp_path / "new.jams", 100)
+    _touch(tmp_path / "notes.txt", 100)
+
+    selected = select_jams_files(tmp_path, {"done.jams", "modified.jams"},
+                                 200, {})
+
+    assert sorted(selected) == sorted([modified, new])
+
+
+def test_select_skips_up_to_date_aligned_files(tmp_path):
+    _touch(tmp_path / "aligned.jams", 100)
+    stale = _touch(tmp_path / "stale.jams", 300)
+
+    selected = select_jams_files(tmp_path, set(), 0.0,
+                                 {"aligned.jams": 200, "stale.jams": 200})
+
+    assert selected == [stale]
+
+
+def test_select_everything_without_previous_run(tmp_path):
+    files = [_touch(tmp_path / f"{name}.jams", 100) for name in "abc"]
+
+    assert sorted(select_jams_files(tmp_path, set(), 0.0, {})) == files
@@ -0,0 +1,58 @@
+import pytest
+import requests
+from spotipy.exceptions import SpotifyException
+from spotipy.oauth2 import SpotifyOauthError
+
+from linking import spotify_links
+
+
+class Spotify:
+    """
+    Spotify client raising the given errors before answering.
+    """
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.requests = []
+
+    def tracks(self, ids):
+        self.requests.append(ids)
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"tracks": [{"external_ids": {"isrc": f"isrc-{spotify_id}"}}
+                           for spotify_id in ids]}
+
+
+@pytest.fixture
+def spotify(monkeypatch):
+    monkeypatch.setattr(spotify_links, "_isrcs", {})
+
+    def install(*errors):
+        client = Spotify(errors)
+        monkeypatch.setattr(spotify_links, "_spotify", lambda: client)
+        return client
+    return install
+
+
+def test_bulk_requests_chunks(spotify, monkeypatch):
+    monkeypatch.setattr(spotify_links, "BULK_SIZE", 2)
+    client = spotify()
+
+    isrcs = spotify_links.get_isrcs_bulk(["a", "b", "c", "a"])
+
+    assert isrcs == {"a": "isrc-a", "b": "isrc-b", "c": "isrc-c"}
+    assert client.requests == [["a", "b"], ["c"]]
+    # answered without querying Spotify again
+    assert spotify_links.get_isrc("b") == "isrc-b"
+    assert len(client.requests) == 2
+
+
+@pytest.mark.parametrize("error", [
+    SpotifyException(500, -1, "error"),
+    SpotifyOauthError("invalid_client"),
+    requests.ConnectionError(),
+])
+def test_bulk_errors_are_retried(spotify, error):
+    spotify(error)
+
+    assert spotify_links.get_isrcs_bulk(["a"]) == {"a": None}
+    assert spotify_links.get_isrc("a") == "isrc-a"